@@ -3,10 +3,17 @@ MD2DOCX MCP Server 核心模块
 """
 
 from .config_manager import get_config_manager, reload_config
-from .unified_converter_manager import get_unified_converter_manager
 
 __all__ = [
     'get_config_manager',
-    'reload_config', 
+    'reload_config',
     'get_unified_converter_manager'
 ]
+
+
+def __getattr__(name):
+    # 转换管理器按需导入，只需要配置管理器的调用方无需加载转换器模块
+    if name == 'get_unified_converter_manager':
+        from .unified_converter_manager import get_unified_converter_manager
+        return get_unified_converter_manager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,102 @@
 """
 配置管理器 - 管理 MD2DOCX MCP 服务器的配置
 """
+import functools
 import json
+import logging
 import os
+import sys
+import tempfile
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, Iterator, Optional, List, Set, Tuple
+from dataclasses import dataclass, field, fields, replace
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选加速依赖，缺失时回退到标准库 json
+    orjson = None
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+def _json_loads(data: bytes) -> Any:
+    """解析 UTF-8 编码的 JSON 字节"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """序列化为两空格缩进的 UTF-8 JSON 字节（保留非 ASCII 字符）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _read_file(path: Path) -> Tuple[bytes, int]:
+    """用单次 open + fstat + read 读取整个文件，返回内容及其 st_mtime_ns"""
+    with open(path, 'rb') as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        return f.read(), mtime_ns
+
+
+def _new_file_mode(directory: Path) -> int:
+    """在 directory 中新建文件时的默认权限（0o666 去掉 umask）
+
+    通过新建一个探测文件获得，不修改进程全局的 umask。
+    """
+    probe = directory / f".{os.getpid()}.{threading.get_ident()}.mode"
+    fd = os.open(probe, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        return os.fstat(fd).st_mode & 0o7777
+    finally:
+        os.close(fd)
+        os.unlink(probe)
+
+
+def _write_file_atomic(path: Path, data: bytes) -> int:
+    """写入同目录临时文件后原子替换目标文件，返回新文件的 st_mtime_ns
+
+    mkstemp 创建的临时文件权限为 0600，替换前改为被替换文件的权限，
+    目标文件不存在时改为与普通 open() 新建文件相同的权限。
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = _new_file_mode(path.parent)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        try:
+            # Windows 上没有 os.fchmod
+            if hasattr(os, 'fchmod'):
+                os.fchmod(fd, mode)
+            else:
+                os.chmod(tmp_path, mode)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+            mtime_ns = os.fstat(fd).st_mtime_ns
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return mtime_ns
+
+
+# 默认支持的 Markdown 扩展名（驻留字符串，供各实例共享）
+_DEFAULT_EXTENSIONS: Tuple[str, ...] = tuple(sys.intern(ext) for ext in (".md", ".markdown", ".txt"))
+
+
+@dataclass(slots=True)
 class ConversionSettings:
     """转换设置"""
     debug_mode: bool = False
@@ -18,9 +106,23 @@ class ConversionSettings:
     preserve_structure: bool = True
     auto_timestamp: bool = True  # 文件被占用时自动添加时间戳
     max_retry_attempts: int = 5
+    output_cache: bool = False  # 按输入内容及其依赖的指纹缓存转换结果
 
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            'debug_mode': self.debug_mode,
+            'output_dir': self.output_dir,
+            'supported_formats': list(self.supported_formats),
+            'default_format': self.default_format,
+            'preserve_structure': self.preserve_structure,
+            'auto_timestamp': self.auto_timestamp,
+            'max_retry_attempts': self.max_retry_attempts,
+            'output_cache': self.output_cache,
+        }
 
-@dataclass
+
+@dataclass(slots=True)
 class BatchSettings:
     """批量转换设置"""
     parallel_jobs: int = 4
@@ -28,30 +130,78 @@ class BatchSettings:
     create_log: bool = True
     log_level: str = "INFO"
 
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            'parallel_jobs': self.parallel_jobs,
+            'skip_existing': self.skip_existing,
+            'create_log': self.create_log,
+            'log_level': self.log_level,
+        }
+
 
-@dataclass
+@functools.lru_cache(maxsize=8)
+def _extension_set(extensions: Tuple[str, ...]) -> frozenset:
+    """扩展名元组对应的小写 frozenset，按元组缓存"""
+    return frozenset(ext.lower() for ext in extensions)
+
+
+@dataclass(slots=True)
 class FileSettings:
     """文件处理设置"""
-    supported_extensions: list = None
+    supported_extensions: Tuple[str, ...] = _DEFAULT_EXTENSIONS
     output_extension_docx: str = ".docx"
     output_extension_pptx: str = ".pptx"
     encoding: str = "utf-8"
     
     def __post_init__(self):
-        if self.supported_extensions is None:
-            self.supported_extensions = [".md", ".markdown", ".txt"]
+        # 从配置文件加载的是 list，统一为不可变的 tuple
+        if not isinstance(self.supported_extensions, tuple):
+            self.supported_extensions = tuple(sys.intern(ext) for ext in self.supported_extensions)
+    
+    @property
+    def output_extension(self) -> str:
+        """默认（DOCX）输出扩展名，兼容旧版单一输出格式的配置接口"""
+        return self.output_extension_docx
+    
+    @property
+    def supported_extension_set(self) -> frozenset:
+        """小写扩展名集合，用于 O(1) 的成员判断"""
+        return _extension_set(tuple(self.supported_extensions))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            'supported_extensions': self.supported_extensions,
+            'output_extension_docx': self.output_extension_docx,
+            'output_extension_pptx': self.output_extension_pptx,
+            'encoding': self.encoding,
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class ServerSettings:
     """服务器设置"""
     md2docx_project_path: str = "md2docx"  # 使用相对路径，指向内置的submodule
     md2pptx_project_path: str = "md2pptx"  # 新增 md2pptx 路径
     use_subprocess: bool = True  # 是否使用子进程调用
     use_python_import: bool = False  # 是否直接导入 Python 模块
+    use_worker_process: bool = True  # 子进程模式下复用常驻工作进程
+    worker_timeout: float = 300  # 工作进程单个请求的超时秒数，超时后终止该进程并回退到一次性子进程
 
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            'md2docx_project_path': self.md2docx_project_path,
+            'md2pptx_project_path': self.md2pptx_project_path,
+            'use_subprocess': self.use_subprocess,
+            'use_python_import': self.use_python_import,
+            'use_worker_process': self.use_worker_process,
+            'worker_timeout': self.worker_timeout,
+        }
 
-@dataclass
+
+@dataclass(slots=True)
 class PPTXSettings:
     """PPTX 特定设置"""
     template_file: str = "Martin Template.pptx"  # 默认模板
@@ -62,8 +212,20 @@ class PPTXSettings:
     enable_animations: bool = False
     transition_style: str = "none"
 
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            'template_file': self.template_file,
+            'slide_layout': self.slide_layout,
+            'theme': self.theme,
+            'aspect_ratio': self.aspect_ratio,
+            'font_size': self.font_size,
+            'enable_animations': self.enable_animations,
+            'transition_style': self.transition_style,
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class DOCXSettings:
     """DOCX 特定设置"""
     template_file: str = ""
@@ -74,13 +236,140 @@ class DOCXSettings:
         "top": 2.54, "bottom": 2.54, "left": 2.54, "right": 2.54
     })
 
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            'template_file': self.template_file,
+            'font_family': self.font_family,
+            'font_size': self.font_size,
+            'line_spacing': self.line_spacing,
+            'page_margins': dict(self.page_margins),
+        }
+
+
+# 配置文件分节名（同时也是 ConfigManager 上的属性名） -> 设置类
+# 在模块加载时构建一次，load_config 据此解码各分节
+_SECTIONS = {
+    'conversion_settings': ConversionSettings,
+    'batch_settings': BatchSettings,
+    'file_settings': FileSettings,
+    'server_settings': ServerSettings,
+    'pptx_settings': PPTXSettings,
+    'docx_settings': DOCXSettings,
+}
+_SECTION_NAMES = tuple(_SECTIONS)
+
+# 在类上缓存字段信息，避免热路径上重复调用 dataclasses.fields()
+for _settings_cls in _SECTIONS.values():
+    _settings_cls._fields = fields(_settings_cls)
+    _settings_cls._field_names = tuple(f.name for f in _settings_cls._fields)
+    _settings_cls._field_set = frozenset(_settings_cls._field_names)
+del _settings_cls
+
+
+def _decode_sections(config_data: Dict[str, Any]) -> Dict[str, Any]:
+    """将配置字典解码为各分节的设置对象，忽略未知分节和未知字段"""
+    decoded = {}
+    for name, settings_cls in _SECTIONS.items():
+        section = config_data.get(name)
+        if section is not None:
+            valid_fields = settings_cls._field_set
+            decoded[name] = settings_cls(**{k: v for k, v in section.items() if k in valid_fields})
+    return decoded
+
+
+# 配置摘要模板，占位符为 "<分节>_<字段名>"（分节名去掉 _settings 后缀）
+_SUMMARY_TEMPLATE = """
+📋 MD2DOCX MCP 服务器配置摘要
+
+🔧 转换设置:
+- 调试模式: {conversion_debug_mode}
+- 输出目录: {conversion_output_dir}
+- 支持格式: {conversion_supported_formats}
+- 默认格式: {conversion_default_format}
+- 保持结构: {conversion_preserve_structure}
+- 自动时间戳: {conversion_auto_timestamp}
+- 最大重试次数: {conversion_max_retry_attempts}
+- 转换结果缓存: {conversion_output_cache}
+
+📦 批量设置:
+- 并行任务数: {batch_parallel_jobs}
+- 跳过已存在: {batch_skip_existing}
+- 创建日志: {batch_create_log}
+- 日志级别: {batch_log_level}
+
+📁 文件设置:
+- 支持扩展名: {file_supported_extensions}
+- DOCX扩展名: {file_output_extension_docx}
+- PPTX扩展名: {file_output_extension_pptx}
+- 文件编码: {file_encoding}
+
+🖥️  服务器设置:
+- MD2DOCX 项目路径: {server_md2docx_project_path}
+- MD2PPTX 项目路径: {server_md2pptx_project_path}
+- 使用子进程: {server_use_subprocess}
+- 使用 Python 导入: {server_use_python_import}
+- 复用工作进程: {server_use_worker_process}
+- 工作进程超时: {server_worker_timeout} 秒
+
+📊 PPTX 设置:
+- 模板文件: {pptx_template_file}
+- 幻灯片布局: {pptx_slide_layout}
+- 主题: {pptx_theme}
+- 宽高比: {pptx_aspect_ratio}
+- 字体大小: {pptx_font_size}
+- 启用动画: {pptx_enable_animations}
+
+📄 DOCX 设置:
+- 模板文件: {docx_template_file}
+- 字体系列: {docx_font_family}
+- 字体大小: {docx_font_size}
+- 行间距: {docx_line_spacing}
+"""
+
+# 摘要占位符 -> (分节名, 字段名)，由各设置类的字段生成
+_SUMMARY_KEYS: Dict[str, Tuple[str, str]] = {
+    f"{name[:-len('_settings')]}_{field_name}": (name, field_name)
+    for name, settings_cls in _SECTIONS.items()
+    for field_name in settings_cls._field_names
+}
+
+# 需要特殊格式化的摘要字段
+_SUMMARY_FORMATTERS = {
+    'conversion_supported_formats': ', '.join,
+    'file_supported_extensions': ', '.join,
+    'docx_template_file': lambda value: value or '默认',
+}
+
+
+class _SettingsView(Mapping):
+    """按摘要占位符读取 ConfigManager 当前设置值的只读映射"""
+    
+    __slots__ = ('_manager',)
+    
+    def __init__(self, manager: "ConfigManager"):
+        self._manager = manager
+    
+    def __getitem__(self, key: str) -> Any:
+        section, attr = _SUMMARY_KEYS[key]
+        value = getattr(getattr(self._manager, section), attr)
+        formatter = _SUMMARY_FORMATTERS.get(key)
+        return formatter(value) if formatter is not None else value
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(_SUMMARY_KEYS)
+    
+    def __len__(self) -> int:
+        return len(_SUMMARY_KEYS)
+
 
 class ConfigManager:
     """配置管理器"""
     
-    def __init__(self, config_file: Optional[str] = None):
+    def __init__(self, config_file: Optional[str] = None, create_if_missing: bool = True):
         self.config_file = config_file or "config/converter_config.json"
         self.config_path = Path(self.config_file)
+        self._create_if_missing = create_if_missing
         
         # 默认配置
         self.conversion_settings = ConversionSettings()
@@ -90,6 +379,21 @@ class ConfigManager:
         self.pptx_settings = PPTXSettings()
         self.docx_settings = DOCXSettings()
         
+        # 写入状态：已变更的分节、各分节上次序列化结果、批量更新嵌套深度
+        self._dirty: Set[str] = set(_SECTION_NAMES)
+        self._last_serialized: Dict[str, Dict[str, Any]] = {}
+        self._pending_save = False
+        self._batch_depth = 0
+        
+        # 最近一次读取/写入的配置数据及对应文件 mtime，文件未变化时 reload 可直接复用
+        self._config_data: Optional[Dict[str, Any]] = None
+        self._mtime_ns: Optional[int] = None
+        
+        # 配置版本号，任何配置变更都会递增；摘要和序列化结果按版本号缓存
+        self._version = 0
+        self._summary_cache: Optional[Tuple[int, str]] = None
+        self._payload_cache: Optional[Tuple[int, bytes]] = None
+        
         # 加载配置
         self.load_config()
     
@@ -97,144 +401,151 @@ class ConfigManager:
         """加载配置文件"""
         if self.config_path.exists():
             try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                
-                # 更新配置
-                if 'conversion_settings' in config_data:
-                    self.conversion_settings = ConversionSettings(**config_data['conversion_settings'])
-                
-                if 'batch_settings' in config_data:
-                    self.batch_settings = BatchSettings(**config_data['batch_settings'])
-                
-                if 'file_settings' in config_data:
-                    self.file_settings = FileSettings(**config_data['file_settings'])
-                
-                if 'server_settings' in config_data:
-                    self.server_settings = ServerSettings(**config_data['server_settings'])
-                
-                if 'pptx_settings' in config_data:
-                    self.pptx_settings = PPTXSettings(**config_data['pptx_settings'])
+                mtime_ns = self.config_path.stat().st_mtime_ns
+                if self._config_data is not None and mtime_ns == self._mtime_ns:
+                    config_data = self._config_data
+                else:
+                    raw, mtime_ns = _read_file(self.config_path)
+                    config_data = _json_loads(raw)
+                    self._config_data = config_data
+                    self._mtime_ns = mtime_ns
                 
-                if 'docx_settings' in config_data:
-                    self.docx_settings = DOCXSettings(**config_data['docx_settings'])
-                
-                print(f"✅ 配置已从 {self.config_path} 加载")
+                # 更新配置（所有分节解码成功后再统一替换）；文件中没有的分节恢复为默认值，
+                # 内存中未保存的修改一并丢弃
+                decoded = _decode_sections(config_data)
+                self._reset_sections(decoded)
+                logger.info("配置已从 %s 加载", self.config_path)
             except Exception as e:
-                print(f"⚠️  配置文件加载失败，使用默认配置: {e}")
+                logger.warning("配置文件加载失败，使用默认配置: %s", e)
         else:
-            print(f"ℹ️  配置文件不存在，使用默认配置: {self.config_path}")
-            self.save_config()  # 创建默认配置文件
+            logger.info("配置文件不存在，使用默认配置: %s", self.config_path)
+            self._reset_sections({})
+            if self._create_if_missing:
+                self.save_config()  # 创建默认配置文件
+    
+    def _reset_sections(self, sections: Dict[str, Any]) -> None:
+        """用给定的分节替换全部设置，未给出的分节使用默认值"""
+        for name, settings_cls in _SECTIONS.items():
+            setattr(self, name, sections[name] if name in sections else settings_cls())
+        self._dirty.update(_SECTION_NAMES)
+        self._pending_save = False
+        self._version += 1
     
     def save_config(self) -> None:
-        """保存配置文件"""
+        """保存配置文件（仅重新序列化有变更的分节，原子替换写入）"""
+        for name in self._dirty:
+            # 经 JSON 往返归一化（tuple 变为 list 等），与从文件读取的数据可以直接比较
+            self._last_serialized[name] = _json_loads(_json_dumps(getattr(self, name).to_dict()))
+        self._dirty.clear()
+        self._pending_save = False
+        
+        config_data = {name: self._last_serialized[name] for name in _SECTION_NAMES}
+        
+        # 内容与磁盘上的文件一致时无需重写
+        if config_data == self._config_data and self._file_unchanged():
+            return
+        
         # 确保配置目录存在
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
         
-        config_data = {
-            'conversion_settings': asdict(self.conversion_settings),
-            'batch_settings': asdict(self.batch_settings),
-            'file_settings': asdict(self.file_settings),
-            'server_settings': asdict(self.server_settings),
-            'pptx_settings': asdict(self.pptx_settings),
-            'docx_settings': asdict(self.docx_settings)
-        }
-        
         try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
-            print(f"✅ 配置已保存到 {self.config_path}")
+            if self._payload_cache is None or self._payload_cache[0] != self._version:
+                self._payload_cache = (self._version, _json_dumps(config_data))
+            self._mtime_ns = _write_file_atomic(self.config_path, self._payload_cache[1])
+            self._config_data = config_data
+            logger.info("配置已保存到 %s", self.config_path)
         except Exception as e:
-            print(f"❌ 配置保存失败: {e}")
+            logger.error("配置保存失败: %s", e)
+    
+    def _file_unchanged(self) -> bool:
+        """配置文件自上次读取/写入后是否未被修改"""
+        try:
+            return self.config_path.stat().st_mtime_ns == self._mtime_ns
+        except OSError:
+            return False
+    
+    def flush(self) -> None:
+        """写出尚未保存的配置变更"""
+        if self._pending_save:
+            self.save_config()
+    
+    @contextmanager
+    def batch_update(self) -> Iterator["ConfigManager"]:
+        """批量更新配置，退出时统一写入一次
+        
+        Example:
+            with config_manager.batch_update():
+                config_manager.update_conversion_settings(debug_mode=True)
+                config_manager.update_batch_settings(parallel_jobs=8)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+    
+    def _mark_dirty(self, section_name: str) -> None:
+        """标记分节已变更，非批量模式下立即保存"""
+        self._dirty.add(section_name)
+        self._version += 1
+        self._pending_save = True
+        if self._batch_depth == 0:
+            self.save_config()
+    
+    def update(self, section: str, **kwargs) -> None:
+        """更新指定分节的设置，仅在有值变化时保存
+        
+        Args:
+            section: 分节名 (conversion/batch/file/server/pptx/docx)
+            **kwargs: 字段名及新值，未知字段会被忽略
+        """
+        section_name = f"{section}_settings"
+        if section_name not in _SECTIONS:
+            raise ValueError(f"未知的设置类型: {section}")
+        
+        target = getattr(self, section_name)
+        valid_fields = _SECTIONS[section_name]._field_set
+        changes = {key: value for key, value in kwargs.items() if key in valid_fields}
+        if not changes:
+            return
+        
+        # 重新构造分节对象，经过 __post_init__ 的规范化（如扩展名列表转为 tuple）后再比较
+        updated = replace(target, **changes)
+        if updated != target:
+            setattr(self, section_name, updated)
+            self._mark_dirty(section_name)
     
     def update_conversion_settings(self, **kwargs) -> None:
         """更新转换设置"""
-        for key, value in kwargs.items():
-            if hasattr(self.conversion_settings, key):
-                setattr(self.conversion_settings, key, value)
-        self.save_config()
+        self.update('conversion', **kwargs)
     
     def update_batch_settings(self, **kwargs) -> None:
         """更新批量设置"""
-        for key, value in kwargs.items():
-            if hasattr(self.batch_settings, key):
-                setattr(self.batch_settings, key, value)
-        self.save_config()
+        self.update('batch', **kwargs)
     
     def update_file_settings(self, **kwargs) -> None:
         """更新文件设置"""
-        for key, value in kwargs.items():
-            if hasattr(self.file_settings, key):
-                setattr(self.file_settings, key, value)
-        self.save_config()
+        self.update('file', **kwargs)
     
     def update_server_settings(self, **kwargs) -> None:
         """更新服务器设置"""
-        for key, value in kwargs.items():
-            if hasattr(self.server_settings, key):
-                setattr(self.server_settings, key, value)
-        self.save_config()
+        self.update('server', **kwargs)
     
     def update_pptx_settings(self, **kwargs) -> None:
         """更新PPTX设置"""
-        for key, value in kwargs.items():
-            if hasattr(self.pptx_settings, key):
-                setattr(self.pptx_settings, key, value)
-        self.save_config()
+        self.update('pptx', **kwargs)
     
     def update_docx_settings(self, **kwargs) -> None:
         """更新DOCX设置"""
-        for key, value in kwargs.items():
-            if hasattr(self.docx_settings, key):
-                setattr(self.docx_settings, key, value)
-        self.save_config()
+        self.update('docx', **kwargs)
     
     def get_config_summary(self) -> str:
-        """获取配置摘要"""
-        return f"""
-📋 MD2DOCX MCP 服务器配置摘要
-
-🔧 转换设置:
-- 调试模式: {self.conversion_settings.debug_mode}
-- 输出目录: {self.conversion_settings.output_dir}
-- 支持格式: {', '.join(self.conversion_settings.supported_formats)}
-- 默认格式: {self.conversion_settings.default_format}
-- 保持结构: {self.conversion_settings.preserve_structure}
-- 自动时间戳: {self.conversion_settings.auto_timestamp}
-- 最大重试次数: {self.conversion_settings.max_retry_attempts}
-
-📦 批量设置:
-- 并行任务数: {self.batch_settings.parallel_jobs}
-- 跳过已存在: {self.batch_settings.skip_existing}
-- 创建日志: {self.batch_settings.create_log}
-- 日志级别: {self.batch_settings.log_level}
-
-📁 文件设置:
-- 支持扩展名: {', '.join(self.file_settings.supported_extensions)}
-- DOCX扩展名: {self.file_settings.output_extension_docx}
-- PPTX扩展名: {self.file_settings.output_extension_pptx}
-- 文件编码: {self.file_settings.encoding}
-
-🖥️  服务器设置:
-- MD2DOCX 项目路径: {self.server_settings.md2docx_project_path}
-- MD2PPTX 项目路径: {self.server_settings.md2pptx_project_path}
-- 使用子进程: {self.server_settings.use_subprocess}
-- 使用 Python 导入: {self.server_settings.use_python_import}
-
-📊 PPTX 设置:
-- 模板文件: {self.pptx_settings.template_file}
-- 幻灯片布局: {self.pptx_settings.slide_layout}
-- 主题: {self.pptx_settings.theme}
-- 宽高比: {self.pptx_settings.aspect_ratio}
-- 字体大小: {self.pptx_settings.font_size}
-- 启用动画: {self.pptx_settings.enable_animations}
-
-📄 DOCX 设置:
-- 模板文件: {self.docx_settings.template_file or '默认'}
-- 字体系列: {self.docx_settings.font_family}
-- 字体大小: {self.docx_settings.font_size}
-- 行间距: {self.docx_settings.line_spacing}
-"""
+        """获取配置摘要（配置未变化时直接返回缓存）"""
+        if self._summary_cache is None or self._summary_cache[0] != self._version:
+            self._summary_cache = (self._version, _SUMMARY_TEMPLATE.format_map(_SettingsView(self)))
+        return self._summary_cache[1]
 
     def reset_to_defaults(self) -> None:
         """重置为默认配置"""
@@ -244,21 +555,41 @@ class ConfigManager:
         self.server_settings = ServerSettings()
         self.pptx_settings = PPTXSettings()
         self.docx_settings = DOCXSettings()
+        self._dirty.update(_SECTION_NAMES)
+        self._version += 1
         self.save_config()
 
 
+def _create_default_manager() -> ConfigManager:
+    """创建全局配置管理器；设置 MD2DOCX_NO_CONFIG_WRITE 时不自动生成默认配置文件"""
+    no_write = os.environ.get("MD2DOCX_NO_CONFIG_WRITE", "").lower() in ("1", "true", "yes")
+    return ConfigManager(create_if_missing=not no_write)
+
+
 # 全局配置实例
-_config_manager = None
+_config_manager: Optional[ConfigManager] = None
+_config_lock = threading.Lock()
 
 def get_config_manager() -> ConfigManager:
-    """获取配置管理器实例"""
+    """获取配置管理器实例（线程安全的懒加载单例）"""
     global _config_manager
     if _config_manager is None:
-        _config_manager = ConfigManager()
+        with _config_lock:
+            if _config_manager is None:
+                _config_manager = _create_default_manager()
     return _config_manager
 
 def reload_config() -> ConfigManager:
-    """重新加载配置"""
+    """重新加载配置
+    
+    在现有实例上原地重新加载，已持有该实例的转换器也能看到新配置。
+    所有分节都恢复为配置文件中的值（文件中没有的分节恢复为默认值），内存中未保存的修改被丢弃；
+    配置文件自上次读取/写入后未修改时不重新读取文件。
+    """
     global _config_manager
-    _config_manager = ConfigManager()
+    with _config_lock:
+        if _config_manager is None:
+            _config_manager = _create_default_manager()
+        else:
+            _config_manager.load_config()
     return _config_manager
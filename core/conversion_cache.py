@@ -0,0 +1,173 @@
+"""
+转换结果缓存 - 按输入内容及其依赖的指纹保存转换产物，相同输入再次转换时直接复制上次的输出
+
+缓存键包含：Markdown 内容、输入文件所在目录、Markdown 引用的本地资源（图片等）的
+mtime/大小，以及调用方提供的其他参数（格式、转换器版本指纹、模板文件指纹等）。
+"""
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+# 缓存根目录，每种输出格式一个子目录
+_CACHE_ROOT = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "md2docx" / "conversions"
+
+# 缓存总大小上限与条目最长保留时间（按最近一次使用计算）
+_MAX_CACHE_BYTES = 512 * 1024 * 1024
+_MAX_CACHE_AGE = 30 * 24 * 3600
+
+# 两次淘汰扫描之间的最短间隔（秒）
+_PRUNE_INTERVAL = 60
+
+# Markdown 图片 / HTML img 引用的资源路径
+_ASSET_REF_RE = re.compile(
+    rb'!\[[^\]]*\]\(\s*<?([^)\s>]+)|<img\s[^>]*?src\s*=\s*["\']([^"\']+)["\']',
+    re.IGNORECASE
+)
+# 带协议的地址（http:、data: 等）不是本地文件；单字母的 "协议" 视为 Windows 盘符
+_URL_SCHEME_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]+:')
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def file_fingerprint(path: Path) -> Tuple[str, Optional[int], Optional[int]]:
+    """文件的 (路径, mtime_ns, 大小)；文件不存在时后两项为 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (str(path), None, None)
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+def _asset_fingerprints(input_bytes: bytes, input_dir: Path) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """Markdown 引用的本地资源的指纹，按路径排序去重"""
+    paths = set()
+    for match in _ASSET_REF_RE.finditer(input_bytes):
+        ref = (match.group(1) or match.group(2)).decode('utf-8', errors='replace')
+        ref = unquote(ref.split('#', 1)[0].split('?', 1)[0])
+        if not ref or _URL_SCHEME_RE.match(ref):
+            continue
+        paths.add(os.path.normpath(input_dir / ref))
+    return [file_fingerprint(Path(path)) for path in sorted(paths)]
+
+
+def cache_key(input_bytes: bytes, input_dir: Path, key_extras: Sequence[Any]) -> str:
+    """由输入内容、输入目录、引用资源的指纹和影响输出的参数计算缓存键"""
+    digest = hashlib.sha256(input_bytes)
+    digest.update(repr((
+        str(input_dir),
+        _asset_fingerprints(input_bytes, input_dir),
+        tuple(key_extras)
+    )).encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def cache_path(fmt: str, key: str, extension: str) -> Path:
+    """缓存条目的文件路径"""
+    return _CACHE_ROOT / fmt / f"{key}{extension}"
+
+
+def _copy_atomic(src: Path, dst: Path) -> None:
+    """先复制到目标目录下的临时文件再原子替换，读取方不会看到写了一半的文件"""
+    tmp_file = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        shutil.copyfile(src, tmp_file)
+        os.replace(tmp_file, dst)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+        raise
+
+
+def fetch(cached_file: Path, output_file: str) -> bool:
+    """缓存命中时把缓存的产物复制到输出路径，返回是否命中"""
+    try:
+        _copy_atomic(cached_file, Path(output_file))
+    except FileNotFoundError:
+        return False
+    try:
+        # 刷新 mtime，淘汰时按最近使用时间计算
+        os.utime(cached_file)
+    except OSError:
+        pass
+    return True
+
+
+def store(output_file: str, cached_file: Path) -> None:
+    """把转换成功的产物保存到缓存，并按需淘汰过期或超出容量的条目"""
+    cached_file.parent.mkdir(parents=True, exist_ok=True)
+    _copy_atomic(Path(output_file), cached_file)
+    _maybe_prune()
+
+
+def _maybe_prune() -> None:
+    """距上次扫描超过 _PRUNE_INTERVAL 时执行一次淘汰"""
+    global _last_prune
+    now = time.monotonic()
+    with _prune_lock:
+        if now - _last_prune < _PRUNE_INTERVAL:
+            return
+        _last_prune = now
+    prune()
+
+
+def _iter_entries():
+    """遍历全部缓存条目，产出 (路径, mtime, 大小)"""
+    try:
+        format_dirs = list(os.scandir(_CACHE_ROOT))
+    except FileNotFoundError:
+        return
+
+    for format_dir in format_dirs:
+        if not format_dir.is_dir():
+            continue
+        with os.scandir(format_dir.path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry.path, st.st_mtime, st.st_size
+
+
+def _unlink(path: str) -> bool:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def prune(max_bytes: int = _MAX_CACHE_BYTES, max_age: float = _MAX_CACHE_AGE) -> int:
+    """删除超过保留时间的条目，总大小仍超限时从最久未使用的条目开始删除，返回删除的文件数"""
+    cutoff = time.time() - max_age
+    removed = 0
+    kept = []
+    for path, mtime, size in _iter_entries():
+        if mtime < cutoff:
+            removed += _unlink(path)
+        else:
+            kept.append((mtime, size, path))
+
+    total = sum(size for _, size, _ in kept)
+    if total > max_bytes:
+        kept.sort()
+        for _, size, path in kept:
+            if total <= max_bytes:
+                break
+            removed += _unlink(path)
+            total -= size
+    return removed
+
+
+def clear_cache() -> int:
+    """删除全部缓存条目，返回删除的文件数"""
+    return sum(_unlink(path) for path, _, _ in list(_iter_entries()))
@@ -18,30 +18,24 @@ class FixedLaTeXRender(LaTeXRender):
     主要修复：标题级别索引越界问题
     """
     
+    # 扩展标题类型，支持更多级别
+    _HEADING_TYPES = (
+        'section',           # level 1: #
+        'subsection',        # level 2: ##  
+        'subsubsection',     # level 3: ###
+        'paragraph',         # level 4: ####
+        'subparagraph',      # level 5: #####
+        'subparagraph'       # level 6+: 使用 subparagraph
+    )
+    _LAST_HEADING_INDEX = len(_HEADING_TYPES) - 1
+    
     def heading(self, text: str, level: int, **attrs) -> str:
         """
         修复版本的标题处理
         支持更多级别的标题
         """
-        # 扩展标题类型，支持更多级别
-        heading_types = [
-            'section',           # level 1: #
-            'subsection',        # level 2: ##  
-            'subsubsection',     # level 3: ###
-            'paragraph',         # level 4: ####
-            'subparagraph',      # level 5: #####
-            'subparagraph'       # level 6+: 使用 subparagraph
-        ]
-        
-        t = self.my_config["heading"]
-        t = t.replace("<text>", text)
+        # 安全的索引访问，超出范围的标题使用最后一个类型
+        heading_type = self._HEADING_TYPES[min(level - 1, self._LAST_HEADING_INDEX)]
         
-        # 安全的索引访问，防止越界
-        if level <= len(heading_types):
-            heading_type = heading_types[level - 1]
-        else:
-            # 超出范围的标题使用最后一个类型
-            heading_type = heading_types[-1]
-            
-        t = t.replace("<heading_types>", heading_type)
-        return t
+        # 模板中含有 LaTeX 花括号，不能使用 str.format，保持逐个替换
+        return self.my_config["heading"].replace("<text>", text).replace("<heading_types>", heading_type)
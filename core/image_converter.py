@@ -4,14 +4,55 @@
 用于将不兼容的图片格式转换为 LaTeX 支持的格式
 """
 
+import asyncio
+import functools
+import itertools
 import os
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import logging
 
+try:
+    from PIL import Image
+    _HAS_PIL = True
+except ImportError:
+    _HAS_PIL = False
+
 logger = logging.getLogger(__name__)
 
+# Pillow 可在进程内直接处理的栅格格式，无需启动外部转换工具
+_PILLOW_FORMATS = frozenset({'.bmp', '.tiff', '.tif', '.gif', '.webp', '.ico'})
+
+# 输出图片的最大边长，与外部工具的参数保持一致
+_MAX_IMAGE_SIZE = 2048
+
+def _detect_conversion_tools() -> Dict[str, bool]:
+    """检测可用的图片转换工具（只在 PATH 中查找可执行文件，不启动子进程）"""
+    tools = {
+        'imagemagick': shutil.which('convert') is not None,
+        'sips': shutil.which('sips') is not None,          # macOS
+        'rsvg': shutil.which('rsvg-convert') is not None,  # SVG
+    }
+    
+    if tools['imagemagick']:
+        logger.info("发现 ImageMagick convert 工具")
+    if tools['sips']:
+        logger.info("发现 macOS sips 工具")
+    if tools['rsvg']:
+        logger.info("发现 rsvg-convert 工具")
+    
+    return tools
+
+
+@functools.lru_cache(maxsize=4)
+def _detect_tools_cached(path_env: str) -> Dict[str, bool]:
+    """按 PATH 缓存工具探测结果（进程内）；探测只是在 PATH 中查找，无需跨进程缓存"""
+    return _detect_conversion_tools()
+
+
 class ImageConverter:
     """图片格式转换器"""
     
@@ -21,46 +62,20 @@ class ImageConverter:
             '.svg', '.ico', '.psd', '.raw'
         }
         self.target_format = '.png'  # 转换目标格式
-        self.conversion_tools = self._detect_conversion_tools()
-    
-    def _detect_conversion_tools(self) -> Dict[str, bool]:
-        """检测可用的图片转换工具"""
-        tools = {}
-        
-        # 检查 ImageMagick convert
-        try:
-            subprocess.run(['convert', '-version'], 
-                         capture_output=True, check=True)
-            tools['imagemagick'] = True
-            logger.info("发现 ImageMagick convert 工具")
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            tools['imagemagick'] = False
-        
-        # 检查 sips (macOS)
-        try:
-            subprocess.run(['sips', '--version'], 
-                         capture_output=True, check=True)
-            tools['sips'] = True
-            logger.info("发现 macOS sips 工具")
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            tools['sips'] = False
-        
-        # 检查 rsvg-convert (SVG)
-        try:
-            subprocess.run(['rsvg-convert', '--version'], 
-                         capture_output=True, check=True)
-            tools['rsvg'] = True
-            logger.info("发现 rsvg-convert 工具")
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            tools['rsvg'] = False
-        
-        return tools
+        self.conversion_tools = dict(_detect_tools_cached(os.environ.get("PATH", "")))
+        self.conversion_tools['pillow'] = _HAS_PIL
     
     def needs_conversion(self, image_path: str) -> bool:
         """检查图片是否需要转换"""
         ext = Path(image_path).suffix.lower()
         return ext in self.supported_input_formats
     
+    def _output_path(self, input_file: Path, output_dir: Optional[str]) -> Path:
+        """输入图片对应的输出路径"""
+        if output_dir:
+            return Path(output_dir) / f"{input_file.stem}{self.target_format}"
+        return input_file.with_suffix(self.target_format)
+    
     def convert_image(self, input_path: str, output_dir: Optional[str] = None) -> Tuple[bool, str, str]:
         """
         转换图片格式
@@ -78,10 +93,7 @@ class ImageConverter:
             return False, "", f"输入文件不存在: {input_path}"
         
         # 确定输出路径
-        if output_dir:
-            output_path = Path(output_dir) / f"{input_file.stem}{self.target_format}"
-        else:
-            output_path = input_file.with_suffix(self.target_format)
+        output_path = self._output_path(input_file, output_dir)
         
         # 确保输出目录存在
         output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -98,6 +110,13 @@ class ImageConverter:
         """使用可用工具进行转换"""
         input_ext = input_path.suffix.lower()
         
+        # 常见栅格格式优先在进程内用 Pillow 转换
+        if input_ext in _PILLOW_FORMATS and self.conversion_tools.get('pillow'):
+            success, error = self._convert_with_pillow(input_path, output_path)
+            if success or not (self.conversion_tools.get('imagemagick') or self.conversion_tools.get('sips')):
+                return success, error
+            logger.warning(f"{error}，改用外部工具")
+        
         # SVG 优先使用 rsvg-convert
         if input_ext == '.svg' and self.conversion_tools.get('rsvg'):
             return self._convert_with_rsvg(input_path, output_path)
@@ -112,6 +131,22 @@ class ImageConverter:
         
         return False, "未找到可用的图片转换工具"
     
+    def _convert_with_pillow(self, input_path: Path, output_path: Path) -> Tuple[bool, str]:
+        """使用 Pillow 在进程内转换"""
+        try:
+            with Image.open(input_path) as img:
+                img.load()
+                if img.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA', 'I', 'I;16'):
+                    img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+                img.thumbnail((_MAX_IMAGE_SIZE, _MAX_IMAGE_SIZE))  # 限制最大尺寸
+                img.save(output_path, 'PNG', optimize=True)
+            
+            logger.info(f"Pillow 转换成功: {input_path} -> {output_path}")
+            return True, ""
+        
+        except Exception as e:
+            return False, f"Pillow 转换异常: {str(e)}"
+    
     def _convert_with_imagemagick(self, input_path: Path, output_path: Path) -> Tuple[bool, str]:
         """使用 ImageMagick 转换"""
         try:
@@ -191,38 +226,82 @@ class ImageConverter:
         except Exception as e:
             return False, f"rsvg-convert 转换异常: {str(e)}"
     
-    def batch_convert(self, input_dir: str, output_dir: Optional[str] = None) -> Dict[str, any]:
-        """批量转换图片"""
-        input_path = Path(input_dir)
-        results = {
+    def _batch_groups(self, input_path: Path, output_dir: Optional[str]) -> List[List[Path]]:
+        """查找需要转换的图片，按输出路径分组
+        
+        同名不同扩展名的图片（如 fig.gif 与 fig.tiff）写入同一个输出文件，同组内按文件名顺序
+        依次转换，最终保留排在最后的结果；不同组之间可以并发。
+        """
+        image_files = sorted(itertools.chain.from_iterable(
+            input_path.glob(f"*{ext}") for ext in self.supported_input_formats
+        ))
+        groups: Dict[Path, List[Path]] = {}
+        for image_file in image_files:
+            groups.setdefault(self._output_path(image_file, output_dir), []).append(image_file)
+        return list(groups.values())
+    
+    def _convert_group(self, group: List[Path], output_dir: Optional[str]) -> List[Tuple[bool, str, str]]:
+        """依次转换写入同一输出文件的一组图片"""
+        return [self.convert_image(str(image_file), output_dir) for image_file in group]
+    
+    @staticmethod
+    def _new_results() -> Dict[str, any]:
+        return {
             'success_count': 0,
             'failed_count': 0,
             'conversions': [],
             'errors': []
         }
+    
+    def _collect_results(self, groups: List[List[Path]], outcomes: List[List[Tuple[bool, str, str]]]) -> Dict[str, any]:
+        """汇总各组的转换结果（按输入文件名排序）"""
+        results = self._new_results()
+        pairs = sorted(
+            zip(itertools.chain.from_iterable(groups), itertools.chain.from_iterable(outcomes)),
+            key=lambda pair: pair[0]
+        )
+        for image_file, (success, output_path, error) in pairs:
+            if success:
+                results['success_count'] += 1
+                results['conversions'].append({
+                    'input': str(image_file),
+                    'output': output_path
+                })
+            else:
+                results['failed_count'] += 1
+                results['errors'].append(f"{image_file}: {error}")
+        return results
+    
+    def batch_convert(self, input_dir: str, output_dir: Optional[str] = None) -> Dict[str, any]:
+        """批量转换图片（在线程池中并发执行，并发数不超过 CPU 核数）"""
+        input_path = Path(input_dir)
+        if not input_path.exists():
+            results = self._new_results()
+            results['errors'].append(f"输入目录不存在: {input_dir}")
+            return results
         
+        groups = self._batch_groups(input_path, output_dir)
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            outcomes = list(executor.map(functools.partial(self._convert_group, output_dir=output_dir), groups))
+        return self._collect_results(groups, outcomes)
+    
+    async def abatch_convert(self, input_dir: str, output_dir: Optional[str] = None) -> Dict[str, any]:
+        """batch_convert 的异步版本（在线程中并发执行，不阻塞事件循环）"""
+        input_path = Path(input_dir)
         if not input_path.exists():
+            results = self._new_results()
             results['errors'].append(f"输入目录不存在: {input_dir}")
             return results
         
-        # 查找需要转换的图片
-        for ext in self.supported_input_formats:
-            for image_file in input_path.glob(f"*{ext}"):
-                success, output_path, error = self.convert_image(
-                    str(image_file), output_dir
-                )
-                
-                if success:
-                    results['success_count'] += 1
-                    results['conversions'].append({
-                        'input': str(image_file),
-                        'output': output_path
-                    })
-                else:
-                    results['failed_count'] += 1
-                    results['errors'].append(f"{image_file}: {error}")
+        groups = await asyncio.to_thread(self._batch_groups, input_path, output_dir)
+        semaphore = asyncio.Semaphore(os.cpu_count() or 1)
         
-        return results
+        async def convert_group(group: List[Path]) -> List[Tuple[bool, str, str]]:
+            async with semaphore:
+                return await asyncio.to_thread(self._convert_group, group, output_dir)
+        
+        outcomes = await asyncio.gather(*(convert_group(group) for group in groups))
+        return self._collect_results(groups, outcomes)
     
     def get_status(self) -> Dict[str, any]:
         """获取转换器状态"""
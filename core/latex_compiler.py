@@ -6,13 +6,220 @@ LaTeX 编译器
 import subprocess
 import os
 import shutil
+import hashlib
+import json
+import re
+import functools
+import io
+import mmap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Sequence, Tuple
 import logging
 import tempfile
 
 logger = logging.getLogger(__name__)
 
+# 编译缓存目录：每个 (文档, 引擎) 一个子目录，保存辅助文件、PDF 及源文件哈希
+_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "md2docx" / "latex"
+
+# 构建记录目录：每个输出 PDF 一个子目录，保存生成它的引擎、编译选项及输入文件列表（.fls）
+_BUILD_RECORD_DIR = _CACHE_DIR / "builds"
+
+# 预编译导言区格式目录：每个 (引擎, 源文件目录, 导言区) 一个子目录
+_FMT_DIR = _CACHE_DIR / "fmt"
+
+# 编译缓存的总大小上限与条目最长保留时间（按最近一次使用计算，即条目目录的 mtime）
+_MAX_CACHE_BYTES = 1024 * 1024 * 1024
+_MAX_CACHE_AGE = 30 * 24 * 3600
+
+# 两次淘汰扫描之间的最短间隔（秒）
+_PRUNE_INTERVAL = 60
+
+# _CACHE_DIR 下存放其他类型条目的子目录，其余子目录均为文档缓存目录
+_CACHE_SUBDIRS = frozenset({"fmt", "builds"})
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+# latexmk 中选择各编译引擎的参数
+_LATEXMK_ENGINE_FLAGS = {
+    "pdflatex": "-pdf",
+    "xelatex": "-xelatex",
+    "lualatex": "-lualatex",
+}
+
+# 不生成 PDF 的草稿模式参数（XeTeX 没有 -draftmode，对应的是只输出 XDV 的 -no-pdf）
+_DRAFT_MODE_FLAGS = {
+    "pdflatex": "-draftmode",
+    "xelatex": "-no-pdf",
+    "lualatex": "-draftmode",
+}
+
+# 出现这些命令的文档首次编译后通常需要重新编译
+_RERUN_LIKELY_RE = re.compile(
+    rb'\\(?:ref|pageref|eqref|autoref|cref|cite[pt]?|tableofcontents|listoffigures|listoftables)\b'
+)
+
+# 参考文献相关命令，与 \bibliography{ \bibliographystyle{ \cite{ \citep{ \citet{ 对应
+_BIBLIOGRAPHY_RE = re.compile(rb'\\(?:bibliography|bibliographystyle|cite[pt]?)\{')
+
+# 超过该大小的源文件通过 mmap 扫描，不复制到 Python 内存中
+_MMAP_THRESHOLD = 1 << 20
+
+# 导言区中含有这些宏包时不能预编译格式：TikZ 的状态无法正确转储，
+# fontspec/xeCJK/ctex 等加载的系统字体也无法写入 .fmt
+_NO_DUMP_RE = re.compile(rb'tikz|pgfplots|fontspec|xeCJK|ctex|luatexja|unicode-math')
+
+# 多次编译过程中的中间文件放在内存文件系统中（可用时），只把最终结果复制到输出目录
+_TMPFS_DIR = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+# 日志中表示需要重新编译的提示
+_RERUN_INDICATORS = (
+    b"Rerun to get cross-references right",
+    b"There were undefined references",
+    b"Label(s) may have changed",
+    b"Rerun LaTeX",
+)
+
+# 判断是否需要重跑时只读取日志末尾（重跑提示由 \end{document} 输出，位于日志末尾）
+_LOG_TAIL_BYTES = 128 * 1024
+
+# 日志中的警告行（LaTeX Warning:、Package xxx Warning:、pdfTeX warning: 等）
+_WARNING_RE = re.compile(rb'warning:', re.IGNORECASE)
+
+# 在两次编译之间保留的辅助文件（交叉引用、目录、参考文献等）
+_AUX_EXTENSIONS = ('.aux', '.toc', '.lof', '.lot', '.bbl', '.out', '.fls', '.fdb_latexmk')
+
+def _touch(path: Path) -> None:
+    """刷新缓存条目目录的 mtime，淘汰时按最近使用时间计算"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _iter_cache_entries():
+    """遍历全部缓存条目目录（文档缓存目录、预编译格式及构建记录），产出 (路径, mtime, 大小)"""
+    parents = [(_CACHE_DIR, _CACHE_SUBDIRS), (_FMT_DIR, frozenset()), (_BUILD_RECORD_DIR, frozenset())]
+    for parent, skipped in parents:
+        try:
+            entries = list(os.scandir(parent))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.name in skipped or not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            yield entry.path, mtime, _dir_size(entry.path)
+
+
+def prune_cache(max_bytes: int = _MAX_CACHE_BYTES, max_age: float = _MAX_CACHE_AGE) -> int:
+    """删除超过保留时间的缓存条目，总大小仍超限时从最久未使用的条目开始删除，返回删除的条目数"""
+    cutoff = time.time() - max_age
+    removed = 0
+    kept = []
+    for path, mtime, size in _iter_cache_entries():
+        if mtime < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        else:
+            kept.append((mtime, size, path))
+    
+    total = sum(size for _, size, _ in kept)
+    if total > max_bytes:
+        kept.sort()
+        for _, size, path in kept:
+            if total <= max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+            total -= size
+    return removed
+
+
+def _maybe_prune_cache() -> None:
+    """距上次扫描超过 _PRUNE_INTERVAL 时执行一次淘汰"""
+    global _last_prune
+    now = time.monotonic()
+    with _prune_lock:
+        if now - _last_prune < _PRUNE_INTERVAL:
+            return
+        _last_prune = now
+    prune_cache()
+
+
+@dataclass
+class LogAnalysis:
+    """LaTeX 日志单次扫描的结果"""
+    needs_rerun: bool = False
+    errors: List[str] = field(default_factory=list)    # 以 ! 开头的错误行及其下一行上下文
+    warnings: List[str] = field(default_factory=list)
+    
+    @property
+    def has_fatal_errors(self) -> bool:
+        return bool(self.errors)
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_command(command: str) -> bool:
+    """检查命令能否正常运行（结果在进程内缓存，多个编译器实例共享）"""
+    if shutil.which(command) is None:
+        return False
+    try:
+        result = subprocess.run(
+            [command, "--version"],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+    except (subprocess.TimeoutExpired, OSError):
+        return False
+    return result.returncode == 0
+
+
+class _ThreadLogCapture(logging.Filter):
+    """把登记过的线程产生的日志记录写入各自的缓冲区，不再交给处理器输出"""
+    
+    def __init__(self):
+        super().__init__()
+        self._formatter = logging.Formatter('%(levelname)s - %(message)s')
+        self._buffers: Dict[int, io.StringIO] = {}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        buffer = self._buffers.get(record.thread)
+        if buffer is None:
+            return True
+        buffer.write(self._formatter.format(record) + "\n")
+        return False
+    
+    def run(self, func, *args, **kwargs) -> Tuple[Any, str]:
+        """在当前线程中执行 func，返回其结果及执行期间缓存的日志"""
+        thread_id = threading.get_ident()
+        buffer = self._buffers[thread_id] = io.StringIO()
+        try:
+            return func(*args, **kwargs), buffer.getvalue()
+        finally:
+            del self._buffers[thread_id]
+
+
 class LaTeXCompiler:
     """
     LaTeX 编译器：处理 LaTeX 到 PDF 的编译
@@ -26,35 +233,39 @@ class LaTeXCompiler:
         self.supported_engines = ["xelatex", "pdflatex", "lualatex"]
         self.default_engine = "xelatex"  # 对中文支持更好
         
-        # 检查可用的编译引擎
-        self.available_engines = self._check_available_engines()
+        # 检查可用的编译引擎；latexmk 根据依赖跟踪决定编译次数，可用时优先使用
+        self.available_engines, self.latexmk_available = self._check_available_engines()
         
-    def _check_available_engines(self) -> List[str]:
-        """检查系统中可用的 LaTeX 编译引擎"""
-        available = []
+    def _check_available_engines(self) -> Tuple[List[str], bool]:
+        """检查系统中可用的 LaTeX 编译引擎及 latexmk（各命令的探测并行进行）"""
+        commands = [*self.supported_engines, "latexmk"]
+        with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+            probes = dict(zip(commands, executor.map(_probe_command, commands)))
         
+        available = []
         for engine in self.supported_engines:
-            try:
-                result = subprocess.run(
-                    [engine, "--version"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                if result.returncode == 0:
-                    available.append(engine)
-                    logger.info(f"发现可用的 LaTeX 引擎: {engine}")
-            except (subprocess.TimeoutExpired, FileNotFoundError):
+            if probes[engine]:
+                available.append(engine)
+                logger.info(f"发现可用的 LaTeX 引擎: {engine}")
+            else:
                 logger.warning(f"LaTeX 引擎不可用: {engine}")
         
-        return available
+        if probes["latexmk"]:
+            logger.info("发现可用的 latexmk")
+        else:
+            logger.info("latexmk 不可用，使用内置的多次编译流程")
+        
+        return available, probes["latexmk"]
     
     def compile(self, 
                 latex_file: str,
                 engine: str = None,
                 output_dir: Optional[str] = None,
                 clean_temp: bool = True,
-                max_runs: int = 3) -> Dict[str, Any]:
+                max_runs: int = 3,
+                use_cache: bool = True,
+                precompile_preamble: bool = False,
+                force: bool = False) -> Dict[str, Any]:
         """
         编译 LaTeX 文件为 PDF
         
@@ -64,6 +275,14 @@ class LaTeXCompiler:
             output_dir: 输出目录（可选）
             clean_temp: 是否清理临时文件
             max_runs: 最大编译次数（处理交叉引用）
+            use_cache: 是否使用编译缓存。源文件内容未变化时直接复用上次的 PDF；
+                内容变化时用上次保留的辅助文件预热，减少交叉引用所需的编译次数。
+                除 .tex 内容外，上次编译 .fls 中记录的输入文件（子文件、图片等）变化时也不复用
+            precompile_preamble: 是否把导言区预编译为 .fmt 格式文件并在之后的编译中复用，
+                省去每次加载宏包的时间。导言区含 TikZ 或系统字体宏包时自动跳过
+            force: 是否强制重新编译。默认在输出 PDF 由相同引擎和选项生成、且比 .tex
+                及上次编译 .fls 中记录的全部输入文件都新时直接返回已有的 PDF；
+                没有构建记录（如 PDF 由其他方式生成）时总是重新编译
             
         Returns:
             编译结果信息
@@ -98,16 +317,90 @@ class LaTeXCompiler:
         # 输出文件路径
         output_file = output_dir / f"{latex_path.stem}.pdf"
         
+        cache_dir = self._get_cache_dir(latex_path, engine) if use_cache else None
+        
+        # 与 make 相同的依赖判断：PDF 由相同的引擎和选项生成且比所有输入都新时无需编译
+        build_options = {
+            "source": str(latex_path.resolve()),
+            "engine": engine,
+            "max_runs": max_runs,
+            "precompile_preamble": precompile_preamble,
+            "latexmk": self.latexmk_available
+        }
+        if not force and self._is_up_to_date(latex_path, output_file, build_options):
+            logger.info(f"PDF 已是最新，跳过编译: {output_file}")
+            return {
+                "success": True,
+                "output_file": str(output_file),
+                "engine": engine,
+                "runs": 0,
+                "warnings": [],
+                "log_file": None,
+                "cached": True
+            }
+        
+
+        source_hash = None
+        if use_cache:
+            source_hash = hashlib.sha256(latex_path.read_bytes()).hexdigest()
+            
+            if self._restore_cached_pdf(cache_dir, source_hash, latex_path.stem, output_file):
+                logger.info(f"LaTeX 源文件未变化，复用缓存的 PDF: {output_file}")
+                return {
+                    "success": True,
+                    "output_file": str(output_file),
+                    "engine": engine,
+                    "runs": 0,
+                    "warnings": [],
+                    "log_file": None,
+                    "cached": True
+                }
+            
+            self._seed_aux_files(cache_dir, latex_path.stem, output_dir)
+        
+        precompiled = None
+        if precompile_preamble:
+            precompiled = self._prepare_precompiled_preamble(latex_path, engine, output_dir)
+        
         try:
-            # 执行编译
-            compile_result = self._compile_latex(
-                latex_path, 
-                engine, 
-                output_dir, 
-                max_runs
-            )
+            # 执行编译（使用预编译格式时由内置流程控制引擎参数）
+            if precompiled is not None:
+                compile_result = self._compile_latex(
+                    latex_path,
+                    engine,
+                    output_dir,
+                    max_runs,
+                    precompiled
+                )
+            elif self.latexmk_available:
+                compile_result = self._compile_with_latexmk(
+                    latex_path,
+                    engine,
+                    output_dir,
+                    max_runs
+                )
+            else:
+                compile_result = self._compile_latex(
+                    latex_path, 
+                    engine, 
+                    output_dir, 
+                    max_runs
+                )
             
             if compile_result["success"]:
+                # 先保存到缓存，再清理临时文件
+                if cache_dir is not None:
+                    self._store_in_cache(
+                        cache_dir,
+                        source_hash,
+                        latex_path.stem,
+                        output_dir,
+                        latex_path.parent.absolute(),
+                        # 预编译格式文件及临时的正文文件由导言区/源文件派生，不作为输入
+                        precompiled or ()
+                    )
+                self._record_build(output_file, output_dir / f"{latex_path.stem}.fls", build_options)
+                
                 # 清理临时文件
                 if clean_temp:
                     self._clean_temp_files(latex_path, output_dir)
@@ -135,123 +428,512 @@ class LaTeXCompiler:
                 "error": f"编译过程异常: {str(e)}",
                 "output_file": None
             }
+        
+        finally:
+            if precompiled is not None:
+                precompiled[1].unlink(missing_ok=True)
+    
+    def _prepare_precompiled_preamble(self,
+                                      latex_path: Path,
+                                      engine: str,
+                                      output_dir: Path) -> Optional[Tuple[Path, Path]]:
+        """拆分导言区与正文，返回 (预编译格式文件, 正文文件)；不适用时返回 None"""
+        source = latex_path.read_bytes()
+        split_at = source.find(b'\\begin{document}')
+        if split_at < 0:
+            return None
+        
+        preamble, body = source[:split_at], source[split_at:]
+        if _NO_DUMP_RE.search(preamble):
+            logger.info("导言区包含无法转储的宏包，跳过预编译格式")
+            return None
+        
+        fmt_file = self._ensure_precompiled_format(preamble, engine, latex_path.parent)
+        if fmt_file is None:
+            return None
+        
+        # 用空行补齐导言区所占的行数，使日志中的行号与原文件一致
+        body_file = output_dir.absolute() / f"{latex_path.stem}.body.tex"
+        body_file.write_bytes(b'\n' * preamble.count(b'\n') + body)
+        return fmt_file, body_file
+    
+    def _ensure_precompiled_format(self, preamble: bytes, engine: str, source_dir: Path) -> Optional[Path]:
+        """生成（或复用缓存的）导言区格式文件"""
+        key = hashlib.sha256(
+            engine.encode('utf-8') + b'\0' + str(source_dir.resolve()).encode('utf-8') + b'\0' + preamble
+        ).hexdigest()[:16]
+        fmt_dir = _FMT_DIR / key
+        fmt_file = fmt_dir / "preamble.fmt"
+        if fmt_file.exists():
+            _touch(fmt_dir)
+            return fmt_file
+        
+        try:
+            fmt_dir.mkdir(parents=True, exist_ok=True)
+            preamble_file = fmt_dir / "preamble.tex"
+            preamble_file.write_bytes(preamble)
+            
+            # 以 ini 模式载入引擎自身的格式，读入导言区后 \dump 为新的格式文件；
+            # 工作目录设为源文件目录，导言区中的相对路径（本地 .sty 等）照常解析
+            cmd = [
+                engine,
+                "-ini",
+                "-interaction=nonstopmode",
+                "-jobname=preamble",
+                f"-output-directory={fmt_dir}",
+                f"&{engine} {preamble_file}\\dump"
+            ]
+            logger.info(f"预编译导言区格式: {' '.join(cmd)}")
+            result = subprocess.run(
+                cmd,
+                cwd=str(source_dir),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=300
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"预编译导言区格式失败: {e}")
+            return None
+        
+        if result.returncode != 0 or not fmt_file.exists():
+            logger.warning("预编译导言区格式失败，改用常规编译")
+            fmt_file.unlink(missing_ok=True)
+            return None
+        
+        return fmt_file
+    
+    def _build_record_dir(self, output_file: Path) -> Path:
+        """输出 PDF 对应的构建记录目录"""
+        key = hashlib.sha1(str(output_file.resolve()).encode('utf-8')).hexdigest()[:16]
+        return _BUILD_RECORD_DIR / key
+    
+    def _record_build(self, output_file: Path, fls_file: Path, build_options: Dict[str, Any]):
+        """保存本次编译的引擎、选项及 .fls，供之后判断 PDF 是否已是最新"""
+        record_dir = self._build_record_dir(output_file)
+        try:
+            record_dir.mkdir(parents=True, exist_ok=True)
+            record_file = record_dir / "build.json"
+            # 先删除旧记录，没有 .fls 或复制中途失败时不会留下与 PDF 不匹配的记录
+            record_file.unlink(missing_ok=True)
+            if not fls_file.exists():
+                return
+            shutil.copy2(fls_file, record_dir / "inputs.fls")
+            with open(record_file, 'w', encoding='utf-8') as f:
+                json.dump(build_options, f)
+            _touch(record_dir)
+        except OSError as e:
+            logger.warning(f"无法写入构建记录 {record_dir}: {e}")
+        _maybe_prune_cache()
+    
+    def _is_up_to_date(self, latex_path: Path, output_file: Path, build_options: Dict[str, Any]) -> bool:
+        """输出 PDF 是否由相同的引擎和选项生成，且比 .tex 及 .fls 中记录的全部输入文件都新
+        
+        没有构建记录或 .fls（引擎 -recorder 记录的输入文件列表）时无法确认依赖，视为已过期。
+        """
+        try:
+            pdf_mtime = output_file.stat().st_mtime
+            if pdf_mtime <= latex_path.stat().st_mtime:
+                return False
+        except OSError:
+            return False
+        
+        record_dir = self._build_record_dir(output_file)
+        try:
+            with open(record_dir / "build.json", 'r', encoding='utf-8') as f:
+                if json.load(f) != build_options:
+                    return False
+            with open(record_dir / "inputs.fls", 'rb') as f:
+                up_to_date = self._fls_inputs_older_than(f, latex_path.parent, pdf_mtime)
+        except (OSError, ValueError):
+            return False
+        if up_to_date:
+            _touch(record_dir)
+        return up_to_date
+    
+    def _read_fls_inputs(self, fls, default_dir: Path) -> List[bytes]:
+        """.fls 中记录的输入文件（绝对路径，去重保序）
+        
+        编译自身写出的文件（同时出现在 OUTPUT 行，如 .aux）不算输入。
+        """
+        pwd = os.fsencode(default_dir)
+        inputs = {}
+        outputs = set()
+        for line in fls:
+            line = line.rstrip(b'\r\n')
+            if line.startswith(b'PWD '):
+                pwd = line[4:]
+            elif line.startswith(b'INPUT '):
+                inputs.setdefault(os.path.join(pwd, line[6:]), None)
+            elif line.startswith(b'OUTPUT '):
+                outputs.add(os.path.join(pwd, line[7:]))
+        return [path for path in inputs if path not in outputs]
+    
+    def _fls_inputs_older_than(self, fls, default_dir: Path, mtime: float) -> bool:
+        """.fls 中的输入文件是否都不比 mtime 新（已不存在的临时文件不参与比较）"""
+        for input_path in self._read_fls_inputs(fls, default_dir):
+            try:
+                if os.stat(input_path).st_mtime > mtime:
+                    return False
+            except OSError:
+                pass
+        return True
+    
+    def _input_fingerprints(self, input_paths: List[str]) -> List[List[Any]]:
+        """输入文件的 [路径, mtime_ns, 大小]；文件不存在时后两项为 None"""
+        fingerprints = []
+        for input_path in input_paths:
+            try:
+                st = os.stat(input_path)
+            except OSError:
+                fingerprints.append([input_path, None, None])
+            else:
+                fingerprints.append([input_path, st.st_mtime_ns, st.st_size])
+        return fingerprints
+    
+    def _get_cache_dir(self, latex_path: Path, engine: str) -> Path:
+        """文档与引擎对应的缓存目录"""
+        key = hashlib.sha1(f"{latex_path.resolve()}\0{engine}".encode('utf-8')).hexdigest()[:16]
+        return _CACHE_DIR / key
+    
+    def _restore_cached_pdf(self, cache_dir: Path, source_hash: str, base_name: str, output_file: Path) -> bool:
+        """源文件哈希与缓存一致、且上次编译读取的其他输入文件都未变化时，把缓存的 PDF 复制到输出位置"""
+        try:
+            with open(cache_dir / "cache.json", 'r', encoding='utf-8') as f:
+                marker = json.load(f)
+            if marker.get("sha256") != source_hash:
+                return False
+            inputs = marker.get("inputs")
+            if inputs is None or self._input_fingerprints([path for path, _, _ in inputs]) != inputs:
+                return False
+            
+            cached_pdf = cache_dir / f"{base_name}.pdf"
+            if cached_pdf != output_file:
+                shutil.copy2(cached_pdf, output_file)
+            _touch(cache_dir)
+            return True
+        except (OSError, ValueError, TypeError):
+            return False
+    
+    def _seed_aux_files(self, cache_dir: Path, base_name: str, output_dir: Path):
+        """用上次编译保留的辅助文件预热输出目录（不覆盖已有文件）"""
+        for ext in _AUX_EXTENSIONS:
+            cached = cache_dir / f"{base_name}{ext}"
+            target = output_dir / f"{base_name}{ext}"
+            if cached.exists() and not target.exists():
+                try:
+                    shutil.copy2(cached, target)
+                except OSError as e:
+                    logger.debug(f"无法复制缓存的辅助文件 {cached}: {e}")
+    
+    def _store_in_cache(self,
+                        cache_dir: Path,
+                        source_hash: str,
+                        base_name: str,
+                        output_dir: Path,
+                        source_dir: Path,
+                        derived_files: Sequence[Path] = ()):
+        """保存本次编译的辅助文件和 PDF，最后写入源文件哈希及其他输入文件的指纹
+        
+        主 .tex 文件（已由哈希覆盖）和 derived_files 不计入输入文件指纹。
+        """
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            marker_file = cache_dir / "cache.json"
+            # 先删除旧标记，避免复制中途失败时留下哈希与 PDF 不匹配的缓存
+            marker_file.unlink(missing_ok=True)
+            
+            for ext in _AUX_EXTENSIONS + ('.pdf',):
+                source = output_dir / f"{base_name}{ext}"
+                if source.exists():
+                    shutil.copy2(source, cache_dir / source.name)
+            
+            # 缓存键还包括 .fls 中记录的其他输入文件（\input 的子文件、图片、宏包等）；
+            # 没有 .fls 时无法确认文档读取了哪些文件，不缓存 PDF
+            try:
+                with open(cache_dir / f"{base_name}.fls", 'rb') as f:
+                    input_paths = [os.fsdecode(path) for path in self._read_fls_inputs(f, source_dir)]
+            except FileNotFoundError:
+                return
+            excluded = {os.path.normpath(path) for path in (source_dir / f"{base_name}.tex", *derived_files)}
+            inputs = self._input_fingerprints(
+                [path for path in input_paths if os.path.normpath(path) not in excluded]
+            )
+            
+            with open(marker_file, 'w', encoding='utf-8') as f:
+                json.dump({"sha256": source_hash, "inputs": inputs}, f)
+        except OSError as e:
+            logger.warning(f"无法写入编译缓存 {cache_dir}: {e}")
+        finally:
+            _touch(cache_dir)
+        _maybe_prune_cache()
     
     def _compile_latex(self, 
                       latex_path: Path, 
                       engine: str, 
                       output_dir: Path, 
-                      max_runs: int) -> Dict[str, Any]:
-        """执行 LaTeX 编译"""
+                      max_runs: int,
+                      precompiled: Optional[Tuple[Path, Path]] = None) -> Dict[str, Any]:
+        """执行 LaTeX 编译
         
-        compile_runs = 0
-        warnings = []
-        log_content = ""
+        precompiled 为 (格式文件, 正文文件) 时，加载预编译格式编译正文，
+        jobname 保持为原文件名，输出文件名不变。
         
-        # 切换到 LaTeX 文件目录（处理相对路径）
-        original_cwd = os.getcwd()
-        os.chdir(latex_path.parent)
+        各次编译在临时工作目录（优先 /dev/shm）中进行，完成后把 PDF、日志和
+        辅助文件（连同 _minted-* 等编译生成的目录中的文件）复制回输出目录，中间过程不反复写磁盘。
+        \include 的子文件会在输出目录的同名子目录中写 .aux，因此先在工作目录中建立与源文件目录
+        相同的子目录结构，并带入上次编译留在这些子目录中的 .aux。
+        """
         
+        work_dir = Path(tempfile.mkdtemp(prefix="md2docx-latex-", dir=_TMPFS_DIR))
         try:
-            for run in range(max_runs):
-                compile_runs += 1
-                
-                # 构建编译命令
-                cmd = [
-                    engine,
-                    "-interaction=nonstopmode",
-                    f"-output-directory={output_dir}",
-                    str(latex_path.name)
-                ]
-                
-                logger.info(f"执行编译 (第{run+1}次): {' '.join(cmd)}")
-                
-                # 执行编译
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # 5分钟超时
-                )
-                
-                # 读取日志文件
-                log_file = output_dir / f"{latex_path.stem}.log"
-                if log_file.exists():
-                    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        log_content = f.read()
-                
-                # 分析编译结果
-                # 先检查是否有严重错误（以 ! 开头的行）
-                has_fatal_errors = False
-                if log_content:
-                    for line in log_content.split('\n'):
-                        if line.strip().startswith('!'):
-                            has_fatal_errors = True
-                            break
-                
-                # 如果有严重错误且返回码非零，则认为编译失败
-                if result.returncode != 0 and has_fatal_errors:
-                    error_msg = self._parse_latex_errors(log_content, result.stderr)
+            # 带入已有的辅助文件（上次编译或缓存预热的结果）
+            for ext in _AUX_EXTENSIONS:
+                existing = output_dir / f"{latex_path.stem}{ext}"
+                if existing.exists():
+                    shutil.copy2(existing, work_dir / existing.name)
+            self._mirror_subdirectories(latex_path.parent, output_dir, work_dir)
+            
+            result = self._run_compile_passes(latex_path, engine, work_dir, max_runs, precompiled)
+            
+            self._copy_back(work_dir, output_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        if result.get("log_file"):
+            result["log_file"] = str(output_dir / f"{latex_path.stem}.log")
+        return result
+    
+    def _mirror_subdirectories(self, source_dir: Path, output_dir: Path, work_dir: Path):
+        """在工作目录中建立源文件目录的子目录结构（跳过隐藏目录），并带入输出目录中对应子目录里的 .aux"""
+        for root, dirs, _ in os.walk(source_dir):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            rel = os.path.relpath(root, source_dir)
+            if rel == os.curdir:
+                continue
+            os.makedirs(work_dir / rel, exist_ok=True)
+            try:
+                with os.scandir(output_dir / rel) as entries:
+                    for entry in entries:
+                        if entry.name.endswith('.aux') and entry.is_file():
+                            shutil.copy2(entry.path, work_dir / rel / entry.name)
+            except OSError:
+                pass
+    
+    def _copy_back(self, work_dir: Path, output_dir: Path):
+        """把工作目录中的文件（含子目录中的文件）复制回输出目录，只建立其中有文件的子目录"""
+        for root, _, names in os.walk(work_dir):
+            if not names:
+                continue
+            target_dir = output_dir / os.path.relpath(root, work_dir)
+            target_dir.mkdir(parents=True, exist_ok=True)
+            for name in names:
+                shutil.copy2(os.path.join(root, name), target_dir / name)
+    
+    def _run_compile_passes(self,
+                            latex_path: Path,
+                            engine: str,
+                            output_dir: Path,
+                            max_runs: int,
+                            precompiled: Optional[Tuple[Path, Path]]) -> Dict[str, Any]:
+        """按需多次运行编译引擎，output_dir 为本次编译的工作目录"""
+        
+        compile_runs = 0
+        warnings = []
+        
+        # 文档有交叉引用/目录且没有可复用的 .aux 时，第一次编译几乎必然需要重跑，
+        # 此时第一次以草稿模式（不生成 PDF）编译，只用于生成 .aux 等辅助文件
+        draft_first_run = (
+            max_runs > 1
+            and not (output_dir / f"{latex_path.stem}.aux").exists()
+            and self._rerun_likely(latex_path)
+        )
+
+        for run in range(max_runs):
+            compile_runs += 1
+            draft_run = draft_first_run and run == 0
+
+            # 构建编译命令
+            # -recorder 生成 .fls 输入文件列表，用于之后判断 PDF 是否已是最新
+            cmd = [engine, "-interaction=nonstopmode", "-recorder"]
+            if draft_run:
+                cmd.append(_DRAFT_MODE_FLAGS[engine])
+            if precompiled is not None:
+                fmt_file, body_file = precompiled
+                cmd += [f"-fmt={fmt_file}", f"-jobname={latex_path.stem}"]
+            cmd += [
+                f"-output-directory={output_dir}",
+                str(body_file) if precompiled is not None else str(latex_path.name)
+            ]
+
+            logger.info(f"执行编译 (第{run+1}次): {' '.join(cmd)}")
+
+            # 在 LaTeX 文件所在目录执行编译（处理相对路径），不改变进程的工作目录
+            result = subprocess.run(
+                cmd,
+                cwd=str(latex_path.parent),
+                stdout=subprocess.DEVNULL,  # 终端输出与 .log 重复，只保留 stderr
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=300  # 5分钟超时
+            )
+
+            log_file = output_dir / f"{latex_path.stem}.log"
+            analysis = None
+
+            # 返回码非零时完整扫描日志；有严重错误（以 ! 开头的行）则认为编译失败
+            if result.returncode != 0:
+                analysis = self._analyze_log(log_file)
+                if analysis.has_fatal_errors:
+                    error_msg = self._format_errors(analysis.errors, result.stderr)
                     return {
                         "success": False,
                         "error": error_msg,
                         "runs": compile_runs,
                         "log_file": str(log_file) if log_file.exists() else None
                     }
-                
-                # 检查是否需要再次编译
-                if not self._needs_recompile(log_content):
-                    break
-                
-                # 解析警告
-                run_warnings = self._parse_latex_warnings(log_content)
-                warnings.extend(run_warnings)
-            
-            # 检查 PDF 是否生成成功
-            pdf_file = output_dir / f"{latex_path.stem}.pdf"
-            if not pdf_file.exists():
-                return {
-                    "success": False,
-                    "error": "PDF 文件未生成，可能存在编译错误",
-                    "runs": compile_runs,
-                    "log_file": str(log_file) if log_file.exists() else None
-                }
-            
+
+            # 草稿模式没有生成 PDF，无论是否需要重跑都还要再编译一次
+            if draft_run:
+                continue
+
+            if analysis is None:
+                # 还能继续编译时先只读日志末尾：需要重跑则直接进入下一次，
+                # 中间各次编译的日志无需完整扫描
+                if run < max_runs - 1 and self._analyze_log(log_file, tail_only=True).needs_rerun:
+                    continue
+                analysis = self._analyze_log(log_file)
+
+            # 最后一次完整编译的警告即为最终结果
+            warnings = analysis.warnings
+
+            # 检查是否需要再次编译
+            if not analysis.needs_rerun:
+                break
+
+        # xelatex 的草稿编译 (-no-pdf) 会留下 .xdv，之后的完整编译不再需要
+        if draft_first_run:
+            (output_dir / f"{latex_path.stem}.xdv").unlink(missing_ok=True)
+
+        # 检查 PDF 是否生成成功
+        pdf_file = output_dir / f"{latex_path.stem}.pdf"
+        if not pdf_file.exists():
             return {
-                "success": True,
+                "success": False,
+                "error": "PDF 文件未生成，可能存在编译错误",
                 "runs": compile_runs,
-                "warnings": warnings,
                 "log_file": str(log_file) if log_file.exists() else None
             }
+
+        return {
+            "success": True,
+            "runs": compile_runs,
+            "warnings": warnings,
+            "log_file": str(log_file) if log_file.exists() else None
+        }
+    
+    def _compile_with_latexmk(self,
+                              latex_path: Path,
+                              engine: str,
+                              output_dir: Path,
+                              max_runs: int) -> Dict[str, Any]:
+        """使用 latexmk 编译，只运行依赖变化所需的最少次数（不超过 max_runs 次）
         
-        finally:
-            # 恢复原始工作目录
-            os.chdir(original_cwd)
-    
-    def _needs_recompile(self, log_content: str) -> bool:
-        """检查是否需要重新编译"""
-        recompile_indicators = [
-            "Rerun to get cross-references right",
-            "There were undefined references",
-            "Label(s) may have changed",
-            "Rerun LaTeX"
+        与内置流程相同，引擎返回码非零但日志中没有严重错误时仍视为成功。
+        """
+        
+        cmd = [
+            "latexmk",
+            _LATEXMK_ENGINE_FLAGS[engine],
+            "-interaction=nonstopmode",
+            "-e", f"$max_repeat={max(1, max_runs)}",
+            f"-output-directory={output_dir.absolute()}",
+            str(latex_path.name)
         ]
         
-        return any(indicator in log_content for indicator in recompile_indicators)
+        logger.info(f"执行编译: {' '.join(cmd)}")
+        
+        result = subprocess.run(
+            cmd,
+            cwd=str(latex_path.parent),
+            capture_output=True,
+            text=True,
+            timeout=600  # latexmk 包含多次编译，超时放宽
+        )
+        
+        # latexmk 每次调用引擎都会输出 "Run number N of rule ..."
+        runs = (result.stdout + result.stderr).count("Run number ")
+        
+        log_file = output_dir / f"{latex_path.stem}.log"
+        analysis = self._analyze_log(log_file)
+        
+        pdf_file = output_dir / f"{latex_path.stem}.pdf"
+        if analysis.has_fatal_errors or not pdf_file.exists():
+            return {
+                "success": False,
+                "error": self._format_errors(analysis.errors, result.stderr),
+                "runs": runs,
+                "log_file": str(log_file) if log_file.exists() else None
+            }
+        
+        return {
+            "success": True,
+            "runs": runs,
+            "warnings": analysis.warnings,
+            "log_file": str(log_file) if log_file.exists() else None
+        }
+    
+    def _rerun_likely(self, latex_path: Path) -> bool:
+        """根据源文件中的引用类命令推测首次编译后是否需要重跑"""
+        try:
+            return _RERUN_LIKELY_RE.search(latex_path.read_bytes()) is not None
+        except OSError:
+            return False
     
-    def _parse_latex_errors(self, log_content: str, stderr: str) -> str:
-        """解析 LaTeX 编译错误"""
+    def _read_log_tail(self, log_file: Path, max_bytes: int = _LOG_TAIL_BYTES) -> bytes:
+        """读取日志末尾至多 max_bytes 字节，丢弃开头不完整的一行"""
+        with open(log_file, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size <= max_bytes:
+                f.seek(0)
+                return f.read()
+            f.seek(size - max_bytes)
+            tail = f.read()
+        newline = tail.find(b'\n')
+        return tail[newline + 1:] if newline >= 0 else b''
+    
+    def _analyze_log(self, log_file: Path, tail_only: bool = False) -> LogAnalysis:
+        """流式扫描 LaTeX 日志（按字节逐行），只解码命中的行
+        
+        tail_only 为 True 时只扫描日志末尾，用于判断是否需要重跑。
+        """
+        analysis = LogAnalysis()
+        
+        try:
+            with (io.BytesIO(self._read_log_tail(log_file)) if tail_only else open(log_file, 'rb')) as f:
+                capture_context = False
+                for line in f:
+                    if capture_context:
+                        # 错误行的下一行通常是出错位置（l.123 ...）
+                        analysis.errors.append(line.rstrip(b'\r\n').decode('utf-8', 'ignore'))
+                        capture_context = False
+                    
+                    if line.lstrip().startswith(b'!'):
+                        analysis.errors.append(line.rstrip(b'\r\n').decode('utf-8', 'ignore'))
+                        capture_context = True
+                    elif _WARNING_RE.search(line):
+                        analysis.warnings.append(line.decode('utf-8', 'ignore').strip())
+                    
+                    if not analysis.needs_rerun and any(indicator in line for indicator in _RERUN_INDICATORS):
+                        analysis.needs_rerun = True
+        except FileNotFoundError:
+            pass
         
-        error_lines = []
+        return analysis
+    
+    def _format_errors(self, errors: List[str], stderr: str) -> str:
+        """组合日志中的错误行与 stderr，生成错误信息"""
         
-        # 从日志中提取错误信息
-        if log_content:
-            lines = log_content.split('\n')
-            for i, line in enumerate(lines):
-                if line.startswith('!'):
-                    error_lines.append(line)
-                    # 添加上下文
-                    if i + 1 < len(lines):
-                        error_lines.append(lines[i + 1])
+        error_lines = list(errors)
         
         # 从 stderr 中提取错误信息
         if stderr:
@@ -262,36 +944,30 @@ class LaTeXCompiler:
         else:
             return "编译失败，但未找到具体错误信息"
     
-    def _parse_latex_warnings(self, log_content: str) -> List[str]:
-        """解析 LaTeX 编译警告"""
-        
-        warnings = []
-        
-        if log_content:
-            lines = log_content.split('\n')
-            for line in lines:
-                if 'Warning:' in line or 'warning:' in line:
-                    warnings.append(line.strip())
-        
-        return warnings
-    
     def _clean_temp_files(self, latex_path: Path, output_dir: Path):
         """清理临时文件"""
         
         temp_extensions = ['.aux', '.log', '.out', '.toc', '.lof', '.lot', 
                           '.bbl', '.blg', '.idx', '.ind', '.ilg', '.fls', 
-                          '.fdb_latexmk', '.synctex.gz']
+                          '.fdb_latexmk', '.synctex.gz', '.xdv']
         
         base_name = latex_path.stem
+        targets = {f"{base_name}{ext}" for ext in temp_extensions}
         
-        for ext in temp_extensions:
-            temp_file = output_dir / f"{base_name}{ext}"
-            if temp_file.exists():
-                try:
-                    temp_file.unlink()
-                    logger.debug(f"删除临时文件: {temp_file}")
-                except Exception as e:
-                    logger.warning(f"无法删除临时文件 {temp_file}: {e}")
+        # 读取一次目录，只对实际存在的临时文件执行删除
+        try:
+            with os.scandir(output_dir) as entries:
+                temp_files = [entry.path for entry in entries if entry.name in targets]
+        except OSError as e:
+            logger.warning(f"无法读取输出目录 {output_dir}: {e}")
+            return
+        
+        for temp_file in temp_files:
+            try:
+                os.unlink(temp_file)
+                logger.debug(f"删除临时文件: {temp_file}")
+            except OSError as e:
+                logger.warning(f"无法删除临时文件 {temp_file}: {e}")
     
     def compile_with_bibliography(self, 
                                  latex_file: str,
@@ -337,60 +1013,66 @@ class LaTeXCompiler:
             output_dir = Path(output_dir)
             output_dir.mkdir(parents=True, exist_ok=True)
         
-        # 切换到 LaTeX 文件目录
-        original_cwd = os.getcwd()
-        os.chdir(latex_path.parent)
-        
-        try:
-            # 第一次编译
-            result1 = self._run_latex_command(engine, latex_path, output_dir)
-            if not result1["success"]:
-                return result1
-            
-            # 运行 BibTeX（如果有参考文献）
-            if bib_file or self._has_bibliography(latex_path):
-                bibtex_result = self._run_bibtex(latex_path.stem, output_dir)
-                if not bibtex_result["success"]:
-                    logger.warning(f"BibTeX 处理失败: {bibtex_result['error']}")
-            
-            # 第二次编译（处理参考文献）
-            result2 = self._run_latex_command(engine, latex_path, output_dir)
-            if not result2["success"]:
-                return result2
-            
-            # 第三次编译（处理交叉引用）
-            result3 = self._run_latex_command(engine, latex_path, output_dir)
-            
-            return result3
+        # 没有参考文献时无需 BibTeX 和固定的三次编译，按常规流程只编译必要的次数
+        if not (bib_file or self._has_bibliography(latex_path)):
+            return self.compile(
+                str(latex_path),
+                engine=engine,
+                output_dir=str(output_dir),
+                clean_temp=False
+            )
         
-        finally:
-            os.chdir(original_cwd)
+        # 第一次编译：只为 BibTeX 生成 .aux，以草稿模式运行，不生成 PDF
+        result1 = self._run_latex_command(engine, latex_path, output_dir, draft=True)
+        if not result1["success"]:
+            return result1
+
+        # 运行 BibTeX
+        bibtex_result = self._run_bibtex(latex_path.stem, output_dir)
+        if not bibtex_result["success"]:
+            logger.warning(f"BibTeX 处理失败: {bibtex_result['error']}")
+
+        # 第二次编译（处理参考文献）
+        result2 = self._run_latex_command(engine, latex_path, output_dir)
+        if not result2["success"]:
+            return result2
+
+        # 第三次编译（处理交叉引用），第二次编译后引用已稳定时跳过
+        if not self._analyze_log(output_dir / f"{latex_path.stem}.log", tail_only=True).needs_rerun:
+            return result2
+        result3 = self._run_latex_command(engine, latex_path, output_dir)
+
+        return result3
     
-    def _run_latex_command(self, engine: str, latex_path: Path, output_dir: Path) -> Dict[str, Any]:
-        """运行单次 LaTeX 编译命令"""
+    def _run_latex_command(self,
+                           engine: str,
+                           latex_path: Path,
+                           output_dir: Path,
+                           draft: bool = False) -> Dict[str, Any]:
+        """运行单次 LaTeX 编译命令，draft 为 True 时只生成辅助文件"""
         
-        cmd = [
-            engine,
-            "-interaction=nonstopmode",
-            f"-output-directory={output_dir}",
+        cmd = [engine, "-interaction=nonstopmode"]
+        if draft:
+            cmd.append(_DRAFT_MODE_FLAGS[engine])
+        cmd += [
+            f"-output-directory={output_dir.absolute()}",
             str(latex_path.name)
         ]
         
         result = subprocess.run(
             cmd,
-            capture_output=True,
+            cwd=str(latex_path.parent),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True,
             timeout=300
         )
         
         if result.returncode != 0:
             log_file = output_dir / f"{latex_path.stem}.log"
-            log_content = ""
-            if log_file.exists():
-                with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    log_content = f.read()
+            analysis = self._analyze_log(log_file)
             
-            error_msg = self._parse_latex_errors(log_content, result.stderr)
+            error_msg = self._format_errors(analysis.errors, result.stderr)
             return {
                 "success": False,
                 "error": error_msg,
@@ -430,22 +1112,69 @@ class LaTeXCompiler:
         """检查 LaTeX 文件是否包含参考文献"""
         
         try:
-            with open(latex_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            bibliography_commands = [
-                '\\bibliography{',
-                '\\bibliographystyle{',
-                '\\cite{',
-                '\\citep{',
-                '\\citet{'
-            ]
-            
-            return any(cmd in content for cmd in bibliography_commands)
+            with open(latex_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size > _MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        return _BIBLIOGRAPHY_RE.search(mm) is not None
+                return _BIBLIOGRAPHY_RE.search(f.read()) is not None
         
         except Exception:
             return False
     
+    def compile_many(self,
+                     latex_files: List[str],
+                     max_parallel: Optional[int] = None,
+                     **kwargs) -> List[Dict[str, Any]]:
+        """
+        并行编译多个 LaTeX 文件
+        
+        每个文件在线程池中调用 compile()（编译由引擎子进程完成，线程只等待子进程）。
+        各文件的编译日志先按线程缓存，全部完成后按输入顺序逐块输出，避免多个任务的日志交错在一起。
+        
+        Args:
+            latex_files: LaTeX 文件路径列表
+            max_parallel: 最大并行数（默认为文件数与 CPU 核数中的较小值）
+            **kwargs: 传递给 compile() 的其他参数
+            
+        Returns:
+            与输入顺序一致的编译结果列表
+        """
+        
+        if not latex_files:
+            return []
+        
+        if max_parallel is None:
+            max_parallel = min(len(latex_files), os.cpu_count() or 1)
+        
+        # 各线程的日志由过滤器截留到各自的缓冲区，主线程的日志照常输出
+        capture = _ThreadLogCapture()
+        logger.addFilter(capture)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+                futures = [
+                    executor.submit(capture.run, self.compile, latex_file, **kwargs)
+                    for latex_file in latex_files
+                ]
+                
+                results = []
+                for latex_file, future in zip(latex_files, futures):
+                    try:
+                        result, job_log = future.result()
+                    except Exception as e:
+                        result, job_log = {
+                            "success": False,
+                            "error": f"编译过程异常: {str(e)}",
+                            "output_file": None
+                        }, ""
+                    
+                    if job_log:
+                        logger.info(f"===== {latex_file} =====\n{job_log.rstrip()}")
+                    results.append(result)
+        finally:
+            logger.removeFilter(capture)
+        
+        return results
+    
     def get_status(self) -> Dict[str, Any]:
         """获取编译器状态"""
         
@@ -453,5 +1182,6 @@ class LaTeXCompiler:
             "available_engines": self.available_engines,
             "default_engine": self.default_engine,
             "supported_engines": self.supported_engines,
+            "latexmk_available": self.latexmk_available,
             "latex_available": len(self.available_engines) > 0
         }
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+MD2DOCX 常驻工作进程
+
+在 md2docx 项目目录下启动，只导入一次转换器，随后循环处理来自 stdin 的转换请求。
+
+协议（每行一个 JSON）:
+    请求: {"input": "...", "output": "...", "debug": false, "encoding": "utf-8"}
+    响应: {"success": true, "message": "..."}
+    批量请求: {"cmd": "batch", "items": [<请求>, ...]}
+    批量响应: {"results": [<响应>, ...]}
+    退出: {"cmd": "quit"} 或关闭 stdin
+"""
+import json
+import os
+import sys
+import traceback
+
+
+def _open_protocol_stream():
+    """保留原 stdout 作为协议通道，并把 fd 1 重定向到 stderr
+
+    转换器内部的 print 输出因此不会混入协议响应。
+    """
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8', buffering=1)
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    return protocol
+
+
+def _save_atomic(doc, output_file):
+    """先写入同目录下的临时文件再替换，输出文件不会出现写了一半的状态"""
+    tmp_file = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        doc.save(tmp_file)
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+        raise
+
+
+def _convert(request, get_converter):
+    encoding = request.get('encoding') or 'utf-8'
+    with open(request['input'], 'r', encoding=encoding) as f:
+        content = f.read()
+
+    doc = get_converter(bool(request.get('debug'))).convert(content)
+    _save_atomic(doc, request['output'])
+    return {'success': True, 'message': f"DOCX转换成功: {request['output']}"}
+
+
+def _handle(request, get_converter):
+    try:
+        return _convert(request, get_converter)
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f"DOCX转换失败: {e}",
+            'traceback': traceback.format_exc() if request.get('debug') else None
+        }
+
+
+def main() -> int:
+    protocol = _open_protocol_stream()
+
+    # 工作目录即 md2docx 项目目录
+    project_path = os.getcwd()
+    if project_path not in sys.path:
+        sys.path.insert(0, project_path)
+    from src.converter import BaseConverter
+
+    # 每种调试模式只创建一个转换器实例，在请求之间复用
+    converters = {}
+
+    def get_converter(debug):
+        converter = converters.get(debug)
+        if converter is None:
+            converter = converters[debug] = BaseConverter(debug=debug)
+        return converter
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {'success': False, 'message': f"无效的请求: {e}"}
+        else:
+            cmd = request.get('cmd')
+            if cmd == 'quit':
+                break
+            if cmd == 'batch':
+                response = {'results': [_handle(item, get_converter) for item in request.get('items', [])]}
+            else:
+                response = _handle(request, get_converter)
+
+        protocol.write(json.dumps(response, ensure_ascii=False) + "\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
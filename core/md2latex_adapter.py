@@ -6,13 +6,23 @@ MD2LaTeX 适配器层
 import sys
 import os
 import yaml
+import functools
 import subprocess
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 模板中 LaTeX 正文的插入位置
+_INSERT_MARKER = "<!-- Insert -->"
+
+
+@functools.lru_cache(maxsize=32)
+def _split_template(template: str) -> Tuple[str, ...]:
+    """按插入标记切分模板（结果缓存），正文拼接时无需再扫描整个模板"""
+    return tuple(template.split(_INSERT_MARKER))
+
 class MD2LaTeXAdapter:
     """
     适配器层：封装 VMIJUNV/md-to-latex 项目
@@ -25,7 +35,6 @@ class MD2LaTeXAdapter:
         self.project_root = Path(__file__).parent.parent
         self.upstream_path = self.project_root / "md2latex"
         self.upstream_tool_path = self.upstream_path / "Tool"
-        self.upstream_available = self._check_upstream()
         
         # 版本兼容性信息
         self.supported_versions = {
@@ -33,24 +42,28 @@ class MD2LaTeXAdapter:
             "1.x": "limited_support"
         }
     
-    def _check_upstream(self) -> bool:
-        """检查上游项目是否可用"""
-        required_files = [
-            "Tool/LaTeXRenderer.py",
-            "Tool/md_to_latex.py", 
-            "Tool/default_convert_config.yaml",
-            "Tool/default_convert_template.txt"
-        ]
+    @functools.cached_property
+    def upstream_available(self) -> bool:
+        """检查上游项目是否可用（结果在进程生命周期内不变，只检查一次）"""
+        required_files = {
+            "LaTeXRenderer.py",
+            "md_to_latex.py", 
+            "default_convert_config.yaml",
+            "default_convert_template.txt"
+        }
         
         if not self.upstream_path.exists():
             logger.warning(f"上游项目目录不存在: {self.upstream_path}")
             return False
         
-        missing_files = []
-        for file_path in required_files:
-            if not (self.upstream_path / file_path).exists():
-                missing_files.append(file_path)
+        # 必需文件都在 Tool 目录下，读取一次目录即可完成全部检查
+        try:
+            with os.scandir(self.upstream_tool_path) as entries:
+                present = {entry.name for entry in entries if entry.is_file()}
+        except OSError:
+            present = set()
         
+        missing_files = sorted(f"Tool/{name}" for name in required_files - present)
         if missing_files:
             logger.warning(f"上游项目缺少必需文件: {missing_files}")
             return False
@@ -105,43 +118,22 @@ class MD2LaTeXAdapter:
         if not self.upstream_available:
             raise RuntimeError("上游 md2latex 项目不可用，请检查 submodule 是否正确初始化")
         
-        # 临时添加上游路径到 Python 路径
-        upstream_tool_str = str(self.upstream_tool_path)
-        if upstream_tool_str not in sys.path:
-            sys.path.insert(0, upstream_tool_str)
-        
         try:
-            # 动态导入上游模块
-            from LaTeXRenderer import LaTeXRender
-            import mistune
-            from mistune.plugins.math import math
-            from mistune.plugins.table import table
-            
-            # 加载默认配置
-            default_config = self._load_default_config()
+            # 默认配置只加载一次；有自定义配置时合并为新字典，不修改缓存的默认配置
             if config:
-                # 合并自定义配置
-                merged_config = {**default_config, **config}
+                merged_config = {**self._default_config, **config}
             else:
-                merged_config = default_config
+                merged_config = self._default_config
             
-            # 创建渲染器
-            renderer = LaTeXRender(my_config=merged_config)
-            markdown_parser = mistune.create_markdown(
-                renderer=renderer, 
-                plugins=[math, table]
-            )
+            # 渲染器在渲染过程中保存文档级状态，每次转换都新建渲染器和解析器，不在文档或线程之间共享
+            markdown_parser = self._create_markdown_parser(merged_config)
             
             # 转换 Markdown 到 LaTeX
             latex_content = markdown_parser(md_content)
             
-            # 如果提供了模板，应用模板
-            if template:
-                latex_content = template.replace("<!-- Insert -->", latex_content)
-            else:
-                # 使用默认模板
-                default_template = self._load_default_template()
-                latex_content = default_template.replace("<!-- Insert -->", latex_content)
+            # 应用模板（未提供时使用默认模板），正文拼接到预先切分好的模板片段之间
+            template_parts = _split_template(template or self._default_template)
+            latex_content = latex_content.join(template_parts)
             
             return latex_content
             
@@ -149,30 +141,55 @@ class MD2LaTeXAdapter:
             raise RuntimeError(f"无法导入上游模块: {e}")
         except Exception as e:
             raise RuntimeError(f"转换过程出错: {e}")
-        finally:
-            # 清理 Python 路径
-            if upstream_tool_str in sys.path:
-                sys.path.remove(upstream_tool_str)
     
-    def _load_default_config(self) -> Dict:
-        """加载默认配置"""
+    @functools.cached_property
+    def _upstream_modules(self) -> Tuple[Any, Any, Any, Any]:
+        """动态导入上游模块（只导入一次）
+        
+        上游路径一次性加入 Python 路径并保留：每次调用都增删 sys.path
+        在并发转换时并不安全，且上游模块导入后本就常驻 sys.modules。
+        """
+        upstream_tool_str = str(self.upstream_tool_path)
+        if upstream_tool_str not in sys.path:
+            sys.path.insert(0, upstream_tool_str)
+        
+        from LaTeXRenderer import LaTeXRender
+        import mistune
+        from mistune.plugins.math import math
+        from mistune.plugins.table import table
+        return LaTeXRender, mistune, math, table
+    
+    def _create_markdown_parser(self, merged_config: Dict) -> Any:
+        """创建渲染器和 mistune 解析器（上游模块只导入一次）"""
+        LaTeXRender, mistune, math, table = self._upstream_modules
+        # 传入副本，渲染器修改配置时不会影响缓存的默认配置
+        renderer = LaTeXRender(my_config=dict(merged_config))
+        return mistune.create_markdown(
+            renderer=renderer, 
+            plugins=[math, table]
+        )
+    
+    @functools.cached_property
+    def _default_config(self) -> Dict:
+        """默认配置（运行期间不变，首次访问时加载并缓存）"""
         config_file = self.upstream_tool_path / "default_convert_config.yaml"
         try:
             with open(config_file, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                return yaml.safe_load(f) or {}
         except Exception as e:
             logger.error(f"无法加载默认配置: {e}")
             return {}
     
-    def _load_default_template(self) -> str:
-        """加载默认模板"""
+    @functools.cached_property
+    def _default_template(self) -> str:
+        """默认模板（运行期间不变，首次访问时加载并缓存）"""
         template_file = self.upstream_tool_path / "default_convert_template.txt"
         try:
             with open(template_file, 'r', encoding='utf-8') as f:
                 return f.read()
         except Exception as e:
             logger.error(f"无法加载默认模板: {e}")
-            return "<!-- Insert -->"  # 最简模板
+            return _INSERT_MARKER  # 最简模板
     
     def get_status(self) -> Dict[str, Any]:
         """获取适配器状态信息"""
@@ -181,7 +198,7 @@ class MD2LaTeXAdapter:
             "upstream_path": str(self.upstream_path),
             "upstream_version": self.get_upstream_version(),
             "compatibility": self.check_compatibility(),
-            "required_files_exist": self._check_upstream()
+            "required_files_exist": self.upstream_available
         }
 
 class UpstreamManager:
@@ -5,12 +5,48 @@ MD2LaTeX 适配器 V2
 
 import sys
 import os
+import hashlib
+import mmap
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional, Any, Union
+from typing import Dict, Optional, Any, Tuple, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 转换结果缓存的最大条目数
+_RESULT_CACHE_SIZE = 64
+
+
+def _read_text_mmap(path: Union[str, Path]) -> str:
+    """通过只读内存映射读取 UTF-8 文本，由操作系统按需换入页面，省去一次缓冲区拷贝
+
+    换行符按文本模式读取的规则统一为 \\n，与 open(..., 'r') 的结果一致。
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # 空文件无法建立映射
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            content = str(mm, 'utf-8')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+
+def _write_text_atomic(path: Path, content: str) -> None:
+    """先写入同目录下的临时文件再原子替换，输出文件不会出现写了一半的状态"""
+    tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+        raise
+
 
 class MD2LaTeXAdapterV2:
     """
@@ -20,14 +56,33 @@ class MD2LaTeXAdapterV2:
     - 更好的错误处理和日志记录
     """
     
+    # 支持的配置和模板（元组保持展示顺序，frozenset 用于成员判断）
+    _SUPPORTED_CONFIGS = ("default", "chinese", "academic")
+    _SUPPORTED_TEMPLATES = ("basic", "academic", "chinese_book")
+    _SUPPORTED_CONFIG_SET = frozenset(_SUPPORTED_CONFIGS)
+    _SUPPORTED_TEMPLATE_SET = frozenset(_SUPPORTED_TEMPLATES)
+    
     def __init__(self):
         self.project_root = Path(__file__).parent.parent
         self.md2latex_path = self.project_root / "md2latex"
         self.available = self._check_availability()
         
+        # 添加 md2latex 路径到 Python 路径（只在初始化时检查一次）
+        if self.available:
+            md2latex_str = str(self.md2latex_path)
+            if md2latex_str not in sys.path:
+                sys.path.insert(0, md2latex_str)
+        
+        # 转换器在首次转换时创建，之后复用
+        self._converter = None
+        
+        # 转换结果缓存（LRU）：相同内容、配置和模板的转换直接返回上次的结果
+        self._result_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+        
         # 支持的配置和模板
-        self.supported_configs = ["default", "chinese", "academic"]
-        self.supported_templates = ["basic", "academic", "chinese_book"]
+        self.supported_configs = list(self._SUPPORTED_CONFIGS)
+        self.supported_templates = list(self._SUPPORTED_TEMPLATES)
         
         # 版本信息
         self.version = "2.0.0"
@@ -35,29 +90,40 @@ class MD2LaTeXAdapterV2:
     
     def _check_availability(self) -> bool:
         """检查 MD2LaTeX 模块是否可用"""
-        required_files = [
+        required_files = {
             "core/converter.py",
             "core/latex_renderer.py",
             "configs/default_config.yaml",
             "templates/basic_template.tex"
-        ]
+        }
         
         if not self.md2latex_path.exists():
             logger.warning(f"MD2LaTeX 目录不存在: {self.md2latex_path}")
             return False
         
-        missing_files = []
-        for file_path in required_files:
-            full_path = self.md2latex_path / file_path
-            if not full_path.exists():
-                missing_files.append(file_path)
+        # 每个子目录只读取一次，用集合判断必需文件是否齐全
+        found = set()
+        for subdir in {path.split('/', 1)[0] for path in required_files}:
+            try:
+                with os.scandir(self.md2latex_path / subdir) as entries:
+                    found.update(f"{subdir}/{entry.name}" for entry in entries if entry.is_file())
+            except OSError:
+                continue
         
+        missing_files = sorted(required_files - found)
         if missing_files:
             logger.warning(f"MD2LaTeX 缺少必需文件: {missing_files}")
             return False
         
         return True
     
+    def _get_converter(self):
+        """获取（首次调用时创建）复用的 MD2LaTeX 转换器"""
+        if self._converter is None:
+            from md2latex import MD2LaTeXConverter
+            self._converter = MD2LaTeXConverter()
+        return self._converter
+    
     def get_status(self) -> Dict[str, Any]:
         """获取适配器状态"""
         return {
@@ -97,25 +163,30 @@ class MD2LaTeXAdapterV2:
         if not self.available:
             raise RuntimeError("MD2LaTeX 模块不可用，请检查安装")
         
-        # 添加 md2latex 路径到 Python 路径
-        md2latex_str = str(self.md2latex_path)
-        if md2latex_str not in sys.path:
-            sys.path.insert(0, md2latex_str)
-        
         try:
-            from md2latex import MD2LaTeXConverter
-            
-            converter = MD2LaTeXConverter()
+            converter = self._get_converter()
             
             # 验证配置和模板
-            if config not in self.supported_configs:
+            if config not in self._SUPPORTED_CONFIG_SET:
                 logger.warning(f"不支持的配置: {config}，使用默认配置")
                 config = "default"
             
-            if template not in self.supported_templates:
+            if template not in self._SUPPORTED_TEMPLATE_SET:
                 logger.warning(f"不支持的模板: {template}，使用基础模板")
                 template = "basic"
             
+            cache_key = (
+                hashlib.blake2b(markdown_content.encode('utf-8'), digest_size=16).digest(),
+                config,
+                template,
+                repr(sorted(custom_config.items())) if custom_config else None
+            )
+            with self._result_cache_lock:
+                cached = self._result_cache.get(cache_key)
+                if cached is not None:
+                    self._result_cache.move_to_end(cache_key)
+                    return cached
+            
             # 执行转换
             result = converter.convert(
                 markdown_content=markdown_content,
@@ -124,6 +195,11 @@ class MD2LaTeXAdapterV2:
                 custom_config=custom_config
             )
             
+            with self._result_cache_lock:
+                self._result_cache[cache_key] = result
+                if len(self._result_cache) > _RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+            
             return result
             
         except ImportError as e:
@@ -136,7 +212,8 @@ class MD2LaTeXAdapterV2:
                     output_file: Optional[Union[str, Path]] = None,
                     config: str = "default",
                     template: str = "basic",
-                    custom_config: Optional[Dict[str, Any]] = None) -> str:
+                    custom_config: Optional[Dict[str, Any]] = None,
+                    use_mmap: bool = False) -> str:
         """
         转换文件
         
@@ -146,6 +223,8 @@ class MD2LaTeXAdapterV2:
             config: 配置名称
             template: 模板名称
             custom_config: 自定义配置
+            use_mmap: 通过内存映射读取输入文件（适合书籍等大文件），
+                结果同样进入转换结果缓存
             
         Returns:
             输出文件路径
@@ -153,22 +232,15 @@ class MD2LaTeXAdapterV2:
         if not self.available:
             raise RuntimeError("MD2LaTeX 模块不可用，请检查安装")
         
-        # 添加 md2latex 路径到 Python 路径
-        md2latex_str = str(self.md2latex_path)
-        if md2latex_str not in sys.path:
-            sys.path.insert(0, md2latex_str)
-        
         try:
-            from md2latex import MD2LaTeXConverter
-            
-            converter = MD2LaTeXConverter()
+            converter = self._get_converter()
             
             # 验证配置和模板
-            if config not in self.supported_configs:
+            if config not in self._SUPPORTED_CONFIG_SET:
                 logger.warning(f"不支持的配置: {config}，使用默认配置")
                 config = "default"
             
-            if template not in self.supported_templates:
+            if template not in self._SUPPORTED_TEMPLATE_SET:
                 logger.warning(f"不支持的模板: {template}，使用基础模板")
                 template = "basic"
             
@@ -188,6 +260,16 @@ class MD2LaTeXAdapterV2:
             # 确保使用绝对路径
             output_file = output_file.resolve()
             
+            if use_mmap:
+                latex_content = self.convert(
+                    _read_text_mmap(input_file),
+                    config=config,
+                    template=template,
+                    custom_config=custom_config
+                )
+                _write_text_atomic(output_file, latex_content)
+                return str(output_file)
+            
             # 执行文件转换
             result_path = converter.convert_file(
                 input_file=input_file,
@@ -3,16 +3,98 @@ MD2LaTeX 增强功能层
 在适配器基础上添加定制功能
 """
 
+import os
 import re
 import yaml
+import functools
+import threading
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Set
 import logging
 
 from .md2latex_adapter import MD2LaTeXAdapter
 
+try:
+    # libyaml 提供的 C 实现，解析速度约为纯 Python 实现的 10 倍
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+try:
+    # RE2 为线性时间匹配引擎，不会回溯；不支持后行断言，这类模式仍使用 re
+    import re2 as _re_linear
+except ImportError:
+    _re_linear = re
+
 logger = logging.getLogger(__name__)
 
+# 中文预处理：只匹配需要修改的位置，替换为固定字符串（无需回调）
+# 英文/数字与其后中文标点之间的空白、逗号/句号/分号后的空白 -> 删除
+_PUNCT_SPACE_REMOVE_RE = re.compile(r'(?<=[a-zA-Z0-9])\s+(?=[，。；：！？])|(?<=[，。；])\s+')
+# 中文标点与其后英文/数字之间 -> 恰好一个空格
+_PUNCT_SPACE_BEFORE_ALNUM_RE = re.compile(r'(?<=[，。；：！？])\s*(?=[a-zA-Z0-9])')
+
+# 交叉引用：[^)]* 与 \s* 重叠，畸形输入下 re 会回溯，优先使用 RE2
+_IMAGE_TITLE_RE = _re_linear.compile(r'!\[([^\]]*)\]\(([^)]*)\s*"([^"]*)"\)')
+
+# 书籍格式：标题层级整体提升一级，一次扫描完成
+_BOOK_LEVEL_MAP = {
+    'subsubsection': '\\subsection{',
+    'subsection': '\\section{',
+    'section': '\\chapter{',
+}
+_BOOK_LEVEL_RE = re.compile(r'\\(subsubsection|subsection|section)\{')
+
+# 增强功能需要的宏包，按加载顺序排列（hyperref 须在 cleveref 之前）
+_ENHANCED_PACKAGES = ('hyperref', 'cleveref', 'natbib')
+# 同时匹配插入位置 graphicx，一次扫描即可得到全部判断所需的信息
+_ENHANCED_PACKAGE_RE = re.compile(r'\\usepackage\{(hyperref|cleveref|natbib|graphicx)\}')
+
+
+def _label_image(match) -> str:
+    """图片标题加上"图"前缀，并以标题作为图片标签"""
+    alt, path, title = match.group(1), match.group(2), match.group(3)
+    return f'![图 {alt}]({path} "{title}")\n\\label{{fig:{title}}}'
+
+
+# 本进程已写入过的模板文件
+_created_templates: Set[str] = set()
+
+
+def _save_template_once(template_file: Path, template: str) -> None:
+    """把内置模板写入模板目录，每个进程只写一次，文件已存在时不覆盖
+
+    先写入同目录下的临时文件再原子替换，并发读取时不会读到写了一半的模板。
+    """
+    key = str(template_file)
+    if key in _created_templates or template_file.exists():
+        return
+    
+    tmp_file = f"{template_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(template)
+        os.replace(tmp_file, template_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+        raise
+    _created_templates.add(key)
+
+
+def _memoize_per_instance(method):
+    """按方法名和参数缓存结果（每个实例一份），同一模板/配置文件只读取和解析一次"""
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        key = (method.__name__,) + args
+        try:
+            return self._file_cache[key]
+        except KeyError:
+            value = self._file_cache[key] = method(self, *args)
+            return value
+    return wrapper
+
+
 class MD2LaTeXEnhanced:
     """
     增强功能层：在上游基础上添加定制功能
@@ -28,6 +110,9 @@ class MD2LaTeXEnhanced:
         self.templates_dir = self.project_root / "templates" / "latex"
         self.configs_dir = self.templates_dir / "configs"
         
+        # 已加载的模板和配置
+        self._file_cache: Dict[tuple, object] = {}
+        
         # 确保目录存在
         self.templates_dir.mkdir(parents=True, exist_ok=True)
         self.configs_dir.mkdir(parents=True, exist_ok=True)
@@ -111,74 +196,20 @@ class MD2LaTeXEnhanced:
     def _preprocess_chinese(self, content: str) -> str:
         """中文预处理"""
         
-        # 中文标点符号优化
-        content = re.sub(r'，\s+', '，', content)  # 去除逗号后多余空格
-        content = re.sub(r'。\s+', '。', content)  # 去除句号后多余空格
-        content = re.sub(r'；\s+', '；', content)  # 去除分号后多余空格
-        
-        # 中英文混排间距优化
-        content = re.sub(r'([a-zA-Z0-9])\s*([，。；：！？])', r'\1\2', content)
-        content = re.sub(r'([，。；：！？])\s*([a-zA-Z0-9])', r'\1 \2', content)
-        
-        # 引号优化
-        content = re.sub(r'"([^"]*)"', r'"\1"', content)  # 英文引号转中文引号
-        
-        return content
-    
-    def _postprocess_chinese(self, latex_content: str) -> str:
-        """中文后处理"""
-        
-        # 修复标题层次问题
-        latex_content = re.sub(r'\\section\{([^}]*)\}([^\\]*?)##\s*([^\\#]*?)\\', 
-                              r'\\section{\1}\n\n\2\n\n\\section{\3}\\', latex_content)
-        
-        # 修复段落格式
-        latex_content = re.sub(r'([^\\])\s*##\s*([^\\]*?)\s*\\', r'\1\n\n\\section{\2}\n\n\\', latex_content)
-        latex_content = re.sub(r'([^\\])\s*###\s*([^\\]*?)\s*\\', r'\1\n\n\\subsection{\2}\n\n\\', latex_content)
-        
-        # 修复列表格式
-        latex_content = re.sub(r'(\d+\.\s+[^\n]*\n?)+', self._fix_ordered_list, latex_content)
-        
-        # 添加中文字体设置（如果需要）
-        if '\\documentclass' in latex_content and 'ctex' not in latex_content:
-            latex_content = latex_content.replace(
-                '\\documentclass{article}',
-                '\\documentclass[UTF8]{ctexart}'
-            )
-        
-        return latex_content
-    
-    def _fix_ordered_list(self, match) -> str:
-        """修复有序列表格式"""
-        text = match.group(0)
-        items = re.findall(r'\d+\.\s+([^\n]*)', text)
-        
-        if items:
-            latex_items = '\n'.join([f'  \\item {item}' for item in items])
-            return f'\n\\begin{{enumerate}}\n{latex_items}\n\\end{{enumerate}}\n'
+        # 中文标点符号优化：去除多余空白
+        content = _PUNCT_SPACE_REMOVE_RE.sub('', content)
         
-        return text
+        # 中英文混排间距优化：标点后的英文/数字前保留一个空格
+        return _PUNCT_SPACE_BEFORE_ALNUM_RE.sub(' ', content)
     
     def _preprocess_for_book(self, content: str, chapter_title: Optional[str]) -> str:
         """书籍格式预处理"""
         
-        # 如果指定了章节标题，添加到开头
+        # 如果指定了章节标题，添加到开头；一级标题本身即按章节处理，无需改写
         if chapter_title:
-            content = f"# {chapter_title}\n\n{content}"
-        
-        # 确保一级标题作为章节
-        lines = content.split('\n')
-        processed_lines = []
+            return f"# {chapter_title}\n\n{content}"
         
-        for line in lines:
-            # 将一级标题转换为章节格式
-            if line.startswith('# '):
-                title = line[2:].strip()
-                processed_lines.append(f"# {title}")
-            else:
-                processed_lines.append(line)
-        
-        return '\n'.join(processed_lines)
+        return content
     
     def _preprocess_enhanced(self, 
                            content: str, 
@@ -200,18 +231,8 @@ class MD2LaTeXEnhanced:
         """添加交叉引用支持"""
         
         # 为图片添加标签
-        content = re.sub(
-            r'!\[([^\]]*)\]\(([^)]*)\s*"([^"]*)"\)',
-            r'![图 \1](\2 "\3")\n\\label{fig:\3}',
-            content
-        )
-        
-        # 为表格添加标签（简单实现）
-        content = re.sub(
-            r'\|([^|]*)\|([^|]*)\|',
-            r'|\1|\2|',
-            content
-        )
+        # 使用回调而非替换模板：RE2 按字节展开模板，会破坏其中的中文
+        content = _IMAGE_TITLE_RE.sub(_label_image, content)
         
         return content
     
@@ -236,11 +257,9 @@ class MD2LaTeXEnhanced:
     def _postprocess_chinese(self, latex_content: str) -> str:
         """中文后处理"""
         
-        # LaTeX 中文优化
-        latex_content = re.sub(r'\\section\{([^}]*)\}', r'\\section{\1}', latex_content)
-        
-        # 添加中文字体设置（如果需要）
-        if '\\documentclass' in latex_content and 'ctex' not in latex_content:
+        # 添加中文字体设置（如果需要）；没有 \documentclass{article} 时 replace 本身不做任何修改，
+        # 无需再单独扫描 \documentclass
+        if 'ctex' not in latex_content:
             latex_content = latex_content.replace(
                 '\\documentclass{article}',
                 '\\documentclass[UTF8]{ctexart}'
@@ -253,38 +272,33 @@ class MD2LaTeXEnhanced:
         
         # 将 section 转换为 chapter（如果使用 book 类）
         if '\\documentclass{book}' in latex_content or '\\documentclass{ctexbook}' in latex_content:
-            latex_content = re.sub(r'\\section\{', r'\\chapter{', latex_content)
-            latex_content = re.sub(r'\\subsection\{', r'\\section{', latex_content)
-            latex_content = re.sub(r'\\subsubsection\{', r'\\subsection{', latex_content)
+            latex_content = _BOOK_LEVEL_RE.sub(lambda m: _BOOK_LEVEL_MAP[m.group(1)], latex_content)
         
         return latex_content
     
     def _postprocess_enhanced(self, latex_content: str) -> str:
         """增强功能后处理"""
         
-        # 添加必要的宏包
-        packages_to_add = [
-            '\\usepackage{hyperref}',
-            '\\usepackage{cleveref}',
-            '\\usepackage{natbib}'
-        ]
-        
-        for package in packages_to_add:
-            if package not in latex_content and '\\usepackage' in latex_content:
-                latex_content = latex_content.replace(
-                    '\\usepackage{graphicx}',
-                    f'\\usepackage{{graphicx}}\n{package}'
-                )
+        # 一次扫描找出已加载的宏包，缺少的一次性插入到 graphicx 之后
+        present = {m.group(1) for m in _ENHANCED_PACKAGE_RE.finditer(latex_content)}
+        missing = [f'\\usepackage{{{package}}}' for package in _ENHANCED_PACKAGES if package not in present]
+        if missing and 'graphicx' in present:
+            latex_content = latex_content.replace(
+                '\\usepackage{graphicx}',
+                '\\usepackage{graphicx}\n' + '\n'.join(missing),
+                1
+            )
         
         return latex_content
     
+    @_memoize_per_instance
     def _get_chinese_config(self) -> Dict:
         """获取中文优化配置"""
         config_file = self.configs_dir / "chinese_optimization.yaml"
         
         if config_file.exists():
             with open(config_file, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=_YamlLoader)
         else:
             # 返回默认中文配置
             return {
@@ -298,13 +312,14 @@ class MD2LaTeXEnhanced:
                 "chinese_spacing": True
             }
     
+    @_memoize_per_instance
     def _get_academic_config(self) -> Dict:
         """获取学术配置"""
         config_file = self.configs_dir / "academic_book.yaml"
         
         if config_file.exists():
             with open(config_file, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=_YamlLoader)
         else:
             # 返回默认学术配置
             return {
@@ -335,8 +350,8 @@ class MD2LaTeXEnhanced:
     
     def _get_enhanced_config(self) -> Dict:
         """获取增强配置"""
-        # 基于学术配置，添加增强功能
-        config = self._get_academic_config()
+        # 基于学术配置（复制一份，不修改缓存的学术配置），添加增强功能
+        config = dict(self._get_academic_config())
         
         # 添加增强功能配置
         config.update({
@@ -347,6 +362,7 @@ class MD2LaTeXEnhanced:
         
         return config
     
+    @_memoize_per_instance
     def _get_template(self, template_name: str) -> str:
         """获取指定模板"""
         template_file = self.templates_dir / f"{template_name}_template.tex"
@@ -358,6 +374,7 @@ class MD2LaTeXEnhanced:
             # 返回默认模板
             return self._get_default_template()
     
+    @_memoize_per_instance
     def _get_ctexbook_template(self) -> str:
         """获取 ctexbook 模板（基于 Open_Data_Book）"""
         template_file = self.templates_dir / "ctexbook_template.tex"
@@ -369,6 +386,7 @@ class MD2LaTeXEnhanced:
             # 创建基于 Open_Data_Book 的默认模板
             return self._create_ctexbook_template()
     
+    @_memoize_per_instance
     def _get_enhanced_template(self) -> str:
         """获取增强模板"""
         template_file = self.templates_dir / "enhanced_template.tex"
@@ -456,9 +474,7 @@ class MD2LaTeXEnhanced:
 \\end{document}"""
         
         # 保存模板到文件
-        template_file = self.templates_dir / "ctexbook_template.tex"
-        with open(template_file, 'w', encoding='utf-8') as f:
-            f.write(template)
+        _save_template_once(self.templates_dir / "ctexbook_template.tex", template)
         
         return template
     
@@ -498,9 +514,7 @@ class MD2LaTeXEnhanced:
 \\end{document}"""
         
         # 保存模板到文件
-        template_file = self.templates_dir / "enhanced_template.tex"
-        with open(template_file, 'w', encoding='utf-8') as f:
-            f.write(template)
+        _save_template_once(self.templates_dir / "enhanced_template.tex", template)
         
         return template
     
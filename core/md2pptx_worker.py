@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+MD2PPTX 常驻工作进程
+
+在 md2pptx 项目目录下启动，md2pptx 脚本只编译一次、第三方依赖（python-pptx 等）只导入一次，
+随后循环处理来自 stdin 的转换请求。每个请求在全新的全局命名空间中执行脚本，
+请求结束后卸载本次导入的项目内模块，下一个请求重新导入，避免 md2pptx 辅助模块的
+模块级状态在请求之间残留。其他进程级状态（第三方库的全局设置等）仍可能共享。
+
+协议（每行一个 JSON）:
+    请求: {"input": "...", "output": "...", "encoding": "utf-8", "header": "template: ...\\n\\n"}
+    响应: {"success": true, "message": "..."}
+    批量请求: {"cmd": "batch", "items": [<请求>, ...]}
+    批量响应: {"results": [<响应>, ...]}
+    退出: {"cmd": "quit"} 或关闭 stdin
+"""
+import io
+import json
+import os
+import sys
+import threading
+import traceback
+
+
+def _open_protocol_stream():
+    """保留原 stdout 作为协议通道，并把 fd 1 重定向到 stderr
+
+    md2pptx 的 print 输出因此不会混入协议响应。
+    """
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8', buffering=1)
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    return protocol
+
+
+def _run_script(code, script_path, markdown, output_file):
+    """以 `md2pptx <output>` 的方式执行脚本，Markdown 内容作为 stdin，返回退出码"""
+    saved_argv, saved_stdin = sys.argv, sys.stdin
+    sys.argv = [script_path, output_file]
+    sys.stdin = io.TextIOWrapper(io.BytesIO(markdown.encode('utf-8')), encoding='utf-8')
+    try:
+        exec(code, {'__name__': '__main__', '__file__': script_path, '__builtins__': __builtins__})
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    finally:
+        sys.argv, sys.stdin = saved_argv, saved_stdin
+    return 0
+
+
+def _drop_project_modules(baseline, project_path):
+    """卸载请求期间导入的、位于项目目录下的模块"""
+    prefix = os.path.join(project_path, '')
+    for name in [name for name in sys.modules if name not in baseline]:
+        module_file = getattr(sys.modules[name], '__file__', None)
+        if module_file and os.path.abspath(module_file).startswith(prefix):
+            del sys.modules[name]
+
+
+def _convert(request, code, script_path):
+    encoding = request.get('encoding') or 'utf-8'
+    with open(request['input'], 'r', encoding=encoding) as f:
+        markdown = request.get('header', '') + f.read()
+
+    # 先写入同目录下的临时文件再替换，输出文件不会出现写了一半的状态（临时文件保留 .pptx 扩展名）
+    output_file = request['output']
+    tmp_file = f"{output_file}.{os.getpid()}.{threading.get_ident()}.tmp.pptx"
+    try:
+        exit_code = _run_script(code, script_path, markdown, tmp_file)
+        if exit_code != 0:
+            raise RuntimeError(f"md2pptx 退出码 {exit_code}")
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+        raise
+    return {'success': True, 'message': f"PPTX转换成功: {output_file}"}
+
+
+def _handle(request, code, script_path, baseline):
+    try:
+        return _convert(request, code, script_path)
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f"PPTX转换失败: {e}",
+            'traceback': traceback.format_exc() if request.get('debug') else None
+        }
+    finally:
+        _drop_project_modules(baseline, os.path.dirname(script_path))
+
+
+def main() -> int:
+    protocol = _open_protocol_stream()
+
+    # 工作目录即 md2pptx 项目目录
+    project_path = os.getcwd()
+    if project_path not in sys.path:
+        sys.path.insert(0, project_path)
+
+    script_path = os.path.join(project_path, "md2pptx")
+    with open(script_path, 'r', encoding='utf-8') as f:
+        code = compile(f.read(), script_path, 'exec')
+
+    # 预热第三方依赖，之后的模块快照作为每个请求结束后的还原基线
+    try:
+        import pptx  # noqa: F401
+    except ImportError:
+        pass
+    baseline = frozenset(sys.modules)
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {'success': False, 'message': f"无效的请求: {e}"}
+        else:
+            cmd = request.get('cmd')
+            if cmd == 'quit':
+                break
+            if cmd == 'batch':
+                response = {'results': [_handle(item, code, script_path, baseline) for item in request.get('items', [])]}
+            else:
+                response = _handle(request, code, script_path, baseline)
+
+        protocol.write(json.dumps(response, ensure_ascii=False) + "\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,195 @@
 """
 统一转换管理器 - 支持多种输出格式的 Markdown 转换
 """
+import codecs
+import contextvars
+import io
 import os
+import re
 import sys
 import subprocess
+import threading
 import asyncio
+import atexit
+import functools
+import multiprocessing
 import time
 import logging
+import weakref
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union, Any
 from datetime import datetime
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 
+from . import conversion_cache
 from .config_manager import get_config_manager
+from .worker_pool import RequestBatcher, WorkerPool, WorkerError
+
+# MCP 服务器根目录（md2docx-mcp-server），相对路径均以此为基准
+_MCP_SERVER_DIR = Path(__file__).absolute().parent.parent
+
+# MD2DOCX 常驻工作进程脚本
+_MD2DOCX_WORKER_SCRIPT = Path(__file__).parent / "md2docx_worker.py"
+
+# MD2PPTX 常驻工作进程脚本
+_MD2PPTX_WORKER_SCRIPT = Path(__file__).parent / "md2pptx_worker.py"
+
+# md2docx 命令行转换的固定部分，输入/输出路径在调用时追加
+_MD2DOCX_CLI_CMD = (sys.executable, "src/cli.py")
+
+# 子进程模式下同时运行的转换进程上限；超过后进程间争用反而使总耗时增加
+_MAX_SUBPROCESS_JOBS = 16
+
+# 向 md2pptx 的 stdin 写入输入时每块读取的字节数（无缓冲读取，每块一次 read 系统调用）
+_INPUT_CHUNK_SIZE = 128 * 1024
+
+# 导入模式下进程池的大小（一次性按上限创建，实际并发由批量转换的信号量控制）
+_MAX_IMPORT_JOBS = os.cpu_count() or 1
+
+# 批量转换日志的写缓冲区大小
+_BATCH_LOG_BUFFER_SIZE = 1 << 20
+
+# 所有已创建的导入模式进程池，解释器退出时统一关闭
+_live_process_pools: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+
+
+@atexit.register
+def _shutdown_process_pools() -> None:
+    for pool in list(_live_process_pools):
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 当前任务是否处于批量转换中（批量转换内的任务继承该值）；只有批量转换使用进程池
+_in_batch: contextvars.ContextVar[bool] = contextvars.ContextVar('in_batch', default=False)
+
+
+@functools.lru_cache(maxsize=64)
+def _resolve_server_path(path: str) -> Path:
+    """将配置中的路径解析为绝对路径，相对路径相对于 MCP 服务器目录"""
+    resolved = Path(path)
+    if not resolved.is_absolute():
+        resolved = _MCP_SERVER_DIR / resolved
+    return resolved
+
+
+@functools.lru_cache(maxsize=8)
+def _extension_pattern(extensions: frozenset) -> "re.Pattern[str]":
+    """把扩展名集合编译为一个匹配文件名结尾的正则（忽略大小写）"""
+    alternatives = '|'.join(re.escape(ext) for ext in sorted(extensions, key=len, reverse=True))
+    return re.compile(rf'(?<=.)(?:{alternatives})\Z', re.IGNORECASE)
+
+
+def _save_document_atomic(doc: Any, output_file: str) -> None:
+    """先保存到同目录下的临时文件再原子替换，输出文件不会出现写了一半的状态"""
+    tmp_file = f"{output_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        doc.save(tmp_file)
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+        raise
+
+
+# 导入模式工作进程内的 md2docx 转换器实例，每种调试模式一个
+_process_md2docx_converters: Dict[bool, Any] = {}
+
+
+def _md2docx_import_job(project_path: str, input_file: str, output_file: str, debug: bool, encoding: str) -> None:
+    """在工作进程中导入 md2docx 并转换单个文件（转换器在进程内复用）"""
+    converter = _process_md2docx_converters.get(debug)
+    if converter is None:
+        if project_path not in sys.path:
+            sys.path.insert(0, project_path)
+        from src.converter import BaseConverter
+        converter = _process_md2docx_converters[debug] = BaseConverter(debug=debug)
+    
+    content = Path(input_file).read_text(encoding=encoding)
+    _save_document_atomic(converter.convert(content), output_file)
+
+
+# 已配置的日志记录器：名称 -> (日志级别, 记录器)
+_LOGGERS: Dict[str, Tuple[str, logging.Logger]] = {}
+
+
+def _setup_logger(name: str, level: str) -> logging.Logger:
+    """获取并配置日志记录器；同名同级别的记录器只配置一次，处理器只在第一次获取时添加"""
+    cached = _LOGGERS.get(name)
+    if cached is not None and cached[0] == level:
+        return cached[1]
+    
+    logger = logging.getLogger(name)
+    # setLevel 会清空 logging 全局的级别缓存，只在级别变化时调用
+    logger.setLevel(level)
+    
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+    
+    _LOGGERS[name] = (level, logger)
+    return logger
+
+
+@functools.lru_cache(maxsize=4)
+def _find_python_executable(virtual_env: Optional[str]) -> str:
+    """选择运行 md2pptx 的 Python：优先当前虚拟环境，其次 MCP 服务器目录下的 .venv"""
+    if virtual_env:
+        venv_python = Path(virtual_env) / 'bin' / 'python'
+    else:
+        venv_python = _MCP_SERVER_DIR / '.venv' / 'bin' / 'python'
+    if venv_python.exists():
+        return str(venv_python)
+    return sys.executable
+
+
+def _effective_parallel_jobs(config) -> int:
+    """实际使用的并发数：子进程模式下不超过 _MAX_SUBPROCESS_JOBS"""
+    jobs = max(1, config.batch_settings.parallel_jobs)
+    if config.server_settings.use_subprocess:
+        jobs = min(jobs, _MAX_SUBPROCESS_JOBS)
+    return jobs
+
+
+def _decode_text(data: bytes, encoding: str) -> str:
+    """按文本模式读取文件的规则解码：换行符统一为 \\n"""
+    text = data.decode(encoding)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _decode_output(data: Optional[bytes]) -> str:
+    """解码子进程输出；输出不一定是合法的 UTF-8，无法解码的字节用替换字符表示"""
+    return data.decode('utf-8', errors='replace') if data else ''
+
+
+async def _stream_to_stdin(process: asyncio.subprocess.Process, input_f, encoding: str, header: bytes) -> None:
+    """把二进制文件按块解码并转为 UTF-8 写入子进程的 stdin，不在内存中构造完整的输入
+
+    换行符按文本模式读取的规则统一为 \\n，跨块的 \\r\\n 也能正确处理。
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+    try:
+        if header:
+            process.stdin.write(header)
+        while True:
+            chunk = await asyncio.to_thread(input_f.read, _INPUT_CHUNK_SIZE)
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                process.stdin.write(text.encode('utf-8'))
+                await process.stdin.drain()
+            if not chunk:
+                break
+    except (BrokenPipeError, ConnectionResetError):
+        # 子进程提前退出，由返回码和 stderr 报告错误
+        pass
+    finally:
+        process.stdin.close()
 
 
 class ConversionError(Exception):
@@ -27,21 +203,18 @@ class BaseConverter(ABC):
     def __init__(self, config_manager):
         self.config = config_manager
         self.logger = self._setup_logger()
+        # 已确认存在的输出目录，批量转换时同一目录只 mkdir 一次
+        self._known_dirs: Set[str] = set()
+        # 子进程环境变量，按 PYTHONPATH 前缀缓存
+        self._subprocess_env: Optional[Tuple[str, Dict[str, str]]] = None
+        # 常驻工作进程池及其请求合并器，按启动命令、工作目录和并发数重建
+        self._worker_pool: Optional[WorkerPool] = None
+        self._worker_batcher: Optional[RequestBatcher] = None
+        self._worker_pool_key: Optional[Tuple[Tuple[str, ...], str, Optional[float]]] = None
     
     def _setup_logger(self) -> logging.Logger:
         """设置日志记录器"""
-        logger = logging.getLogger(f"md2{self.get_format()}_converter")
-        logger.setLevel(getattr(logging, self.config.batch_settings.log_level))
-        
-        if not logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-        
-        return logger
+        return _setup_logger(f"md2{self.get_format()}_converter", self.config.batch_settings.log_level)
     
     @abstractmethod
     def get_format(self) -> str:
@@ -75,21 +248,94 @@ class BaseConverter(ABC):
         input_file: str, 
         output_file: str, 
         debug: bool,
+        input_bytes: Optional[bytes] = None,
         **kwargs
     ) -> Dict[str, Union[str, bool]]:
-        """通过Python模块导入转换"""
+        """通过Python模块导入转换（input_bytes 为调用方已读取的输入内容）"""
         pass
     
+    def _ensure_dir(self, directory: Path) -> None:
+        """确保目录存在，已创建过的目录不再重复调用 mkdir"""
+        key = str(directory)
+        if key not in self._known_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(key)
+    
+    def _get_subprocess_env(self, python_path: str) -> Dict[str, str]:
+        """返回把 python_path 加到 PYTHONPATH 前面的环境变量（只构建一次，调用方不得修改）"""
+        if self._subprocess_env is None or self._subprocess_env[0] != python_path:
+            env = os.environ.copy()
+            if 'PYTHONPATH' in env:
+                env['PYTHONPATH'] = f"{python_path}:{env['PYTHONPATH']}"
+            else:
+                env['PYTHONPATH'] = python_path
+            self._subprocess_env = (python_path, env)
+        return self._subprocess_env[1]
+    
+    def _converter_source_files(self, project_path: Path) -> List[Path]:
+        """转换器自身的源文件，其指纹作为缓存键中的转换器版本"""
+        return []
+    
+    def _cache_key_extras(self, **kwargs) -> Tuple:
+        """除输入内容、输入目录和引用资源外影响转换产物的参数（调试模式不影响产物，不计入）"""
+        project_path = self.get_project_path()
+        return (
+            self.get_format(),
+            str(project_path),
+            self.config.file_settings.encoding,
+            tuple(sorted(kwargs.items())),
+            tuple(conversion_cache.file_fingerprint(path) for path in self._converter_source_files(project_path))
+        )
+    
+    def _cache_key(self, input_bytes: bytes, input_path: Path, **kwargs) -> str:
+        """计算缓存键（会 stat 引用的资源和转换器源文件，应在线程中调用）"""
+        return conversion_cache.cache_key(input_bytes, input_path.parent, self._cache_key_extras(**kwargs))
+    
+    def _get_worker_batcher(self, cmd: Sequence[str], project_path: Path, env: Dict[str, str]) -> RequestBatcher:
+        """获取（必要时重建）常驻工作进程池及其请求合并器
+
+        进程池按 _MAX_SUBPROCESS_JOBS 创建（工作进程按需启动），并发数变化时只调整
+        请求合并器的并发上限，不重建进程池。
+        """
+        timeout = self.config.server_settings.worker_timeout or None
+        key = (tuple(cmd), str(project_path), timeout)
+        if self._worker_pool is None or self._worker_pool_key != key:
+            if self._worker_pool is not None:
+                self._worker_pool.shutdown()
+            self._worker_pool = WorkerPool(
+                cmd,
+                cwd=str(project_path),
+                env=env,
+                max_workers=_MAX_SUBPROCESS_JOBS,
+                timeout=timeout
+            )
+            self._worker_batcher = RequestBatcher(self._worker_pool)
+            self._worker_pool_key = key
+        self._worker_batcher.max_in_flight = _effective_parallel_jobs(self.config)
+        return self._worker_batcher
+    
+    def close(self) -> None:
+        """关闭常驻工作进程等后台资源（之后的转换会按需重新创建）"""
+        if self._worker_pool is not None:
+            self._worker_pool.shutdown()
+            self._worker_pool = None
+            self._worker_batcher = None
+            self._worker_pool_key = None
+    
+    def forget_known_dirs(self) -> None:
+        """清空已创建目录的缓存（目录可能在两次批量转换之间被删除）"""
+        self._known_dirs.clear()
+    
     def validate_input(self, input_file: str) -> bool:
         """验证输入文件"""
         input_path = Path(input_file)
+        # 先做不涉及系统调用的扩展名判断；is_file() 对不存在的路径返回 False，无需再单独 exists()
         return (
-            input_path.exists() 
-            and input_path.is_file() 
-            and input_path.suffix.lower() in self.config.file_settings.supported_extensions
+            input_path.suffix.lower() in self.config.file_settings.supported_extension_set
+            and input_path.is_file()
         )
     
-    def get_supported_extensions(self) -> List[str]:
+    def get_supported_extensions(self) -> Tuple[str, ...]:
         """获取支持的扩展名"""
         return self.config.file_settings.supported_extensions
     
@@ -98,6 +344,7 @@ class BaseConverter(ABC):
         input_file: str, 
         output_file: Optional[str] = None,
         debug: bool = None,
+        input_bytes: Optional[bytes] = None,
         **kwargs
     ) -> Dict[str, Union[str, bool]]:
         """
@@ -107,6 +354,7 @@ class BaseConverter(ABC):
             input_file: 输入文件路径
             output_file: 输出文件路径（可选）
             debug: 调试模式（可选，使用配置默认值）
+            input_bytes: 调用方已读取的输入文件内容（可选，提供时不再重复读取和 stat）
             **kwargs: 格式特定参数
         
         Returns:
@@ -115,35 +363,39 @@ class BaseConverter(ABC):
         try:
             # 验证输入文件
             input_path = Path(input_file)
-            if not input_path.exists():
-                raise ConversionError(f"输入文件不存在: {input_file}")
+            if input_bytes is not None:
+                file_size = len(input_bytes)
+            else:
+                try:
+                    file_size = input_path.stat().st_size
+                except FileNotFoundError:
+                    raise ConversionError(f"输入文件不存在: {input_file}")
             
-            if not input_path.suffix.lower() in self.get_supported_extensions():
+            if not input_path.suffix.lower() in self.config.file_settings.supported_extension_set:
                 raise ConversionError(f"不支持的文件类型: {input_path.suffix}")
             
             # 确定输出文件路径
             if output_file is None:
-                output_dir = Path(self.config.conversion_settings.output_dir)
-                if not output_dir.is_absolute():
-                    # 如果是相对路径，相对于 MCP 服务器的工作目录
-                    mcp_server_dir = Path(__file__).parent.parent  # md2docx-mcp-server 目录
-                    output_dir = mcp_server_dir / output_dir
+                # 如果是相对路径，相对于 MCP 服务器的工作目录
+                output_dir = _resolve_server_path(self.config.conversion_settings.output_dir)
                 
                 # 创建格式特定的子目录
                 format_dir = output_dir / self.get_format()
-                format_dir.mkdir(parents=True, exist_ok=True)
+                self._ensure_dir(format_dir)
                 
                 output_file = str(format_dir / f"{input_path.stem}{self.get_output_extension()}")
             else:
-                # 确保输出文件路径是绝对路径
+                # 确保输出文件路径是绝对路径（相对于 MCP 服务器目录）
                 output_path = Path(output_file)
                 if not output_path.is_absolute():
-                    # 相对于 MCP 服务器目录
-                    mcp_server_dir = Path(__file__).parent.parent
-                    output_path = mcp_server_dir / output_path
+                    output_path = _MCP_SERVER_DIR / output_path
                 output_file = str(output_path)
                 # 确保输出目录存在
-                output_path.parent.mkdir(parents=True, exist_ok=True)
+                self._ensure_dir(output_path.parent)
+            
+            # 两个分支得到的输出路径都已是绝对路径；输入路径只解析一次，之后各步骤直接使用
+            abs_output_file = output_file
+            abs_input_file = str(input_path.absolute())
             
             # 确定调试模式
             if debug is None:
@@ -151,39 +403,67 @@ class BaseConverter(ABC):
             
             # 调试信息：显示实际路径
             if debug:
-                self.logger.info(f"Input file (absolute): {input_path.absolute()}")
-                self.logger.info(f"Output file (absolute): {Path(output_file).absolute()}")
-                self.logger.info(f"Current working directory: {Path.cwd()}")
+                self.logger.info("Input file (absolute): %s", abs_input_file)
+                self.logger.info("Output file (absolute): %s", abs_output_file)
+                self.logger.info("Current working directory: %s", Path.cwd())
             
             # 执行转换
             start_time = time.time()
             
-            if self.config.server_settings.use_subprocess:
-                result = await self._convert_via_subprocess(input_file, output_file, debug, **kwargs)
+            # 输入内容与参数都相同的转换直接复用缓存的产物
+            cached_file = None
+            if self.config.conversion_settings.output_cache:
+                if input_bytes is None:
+                    input_bytes = await asyncio.to_thread(input_path.read_bytes)
+                key = await asyncio.to_thread(
+                    functools.partial(self._cache_key, input_bytes, Path(abs_input_file), **kwargs)
+                )
+                cached_file = conversion_cache.cache_path(self.get_format(), key, self.get_output_extension())
+            
+            if cached_file is not None and await asyncio.to_thread(conversion_cache.fetch, cached_file, output_file):
+                result = {
+                    'success': True,
+                    'message': f"{self.get_format().upper()}转换成功（使用缓存）: {abs_output_file}"
+                }
             else:
-                result = await self._convert_via_import(input_file, output_file, debug, **kwargs)
+                if self.config.server_settings.use_subprocess:
+                    result = await self._convert_via_subprocess(abs_input_file, output_file, debug, **kwargs)
+                else:
+                    result = await self._convert_via_import(
+                        abs_input_file, output_file, debug, input_bytes=input_bytes, **kwargs
+                    )
+                
+                if result['success'] and cached_file is not None:
+                    try:
+                        await asyncio.to_thread(conversion_cache.store, output_file, cached_file)
+                    except OSError as e:
+                        self.logger.warning("写入转换缓存失败: %s", e)
             
             end_time = time.time()
             
+            if not result['success']:
+                # 输出目录可能已被外部删除，下次转换时重新创建
+                self._known_dirs.discard(str(Path(output_file).parent))
+            
             return {
                 'success': result['success'],
                 'input_file': input_file,
-                'output_file': str(Path(output_file).absolute()),
+                'output_file': abs_output_file,
                 'format': self.get_format(),
                 'message': result['message'],
                 'duration': round(end_time - start_time, 2),
-                'file_size': input_path.stat().st_size if input_path.exists() else 0,
+                'file_size': file_size,
                 'debug_info': {
-                    'absolute_output_path': str(Path(output_file).absolute()),
+                    'absolute_output_path': abs_output_file,
                     'current_working_dir': str(Path.cwd()),
                     'project_working_dir': str(self.get_project_path()),
-                    'mcp_server_dir': str(Path(__file__).parent.parent),
+                    'mcp_server_dir': str(_MCP_SERVER_DIR),
                     'subprocess_result': result.get('debug_info')
                 } if debug else None
             }
         
         except Exception as e:
-            self.logger.error(f"转换失败: {input_file} -> {e}")
+            self.logger.error("转换失败: %s -> %s", input_file, e)
             return {
                 'success': False,
                 'input_file': input_file,
@@ -198,15 +478,27 @@ class BaseConverter(ABC):
 class DOCXConverter(BaseConverter):
     """DOCX 转换器"""
     
+    def __init__(self, config_manager):
+        super().__init__(config_manager)
+        # 导入模式下的 md2docx 转换器实例，每种调试模式一个，在文件之间复用
+        self._md2docx_converters: Dict[bool, Any] = {}
+        self._md2docx_lock = threading.Lock()
+        # 导入模式下并行转换使用的进程池，绕过 GIL 让 CPU 密集的渲染分布到多核
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_pool_key: Optional[str] = None
+    
     def get_format(self) -> str:
         return "docx"
     
+    def _converter_source_files(self, project_path: Path) -> List[Path]:
+        # md2docx 的全部 Python 源文件
+        files = []
+        for root, _, names in os.walk(project_path / "src"):
+            files.extend(Path(root) / name for name in names if name.endswith('.py'))
+        return sorted(files)
+    
     def get_project_path(self) -> Path:
-        project_path = Path(self.config.server_settings.md2docx_project_path)
-        if not project_path.is_absolute():
-            mcp_server_dir = Path(__file__).parent.parent
-            project_path = mcp_server_dir / project_path
-        return project_path
+        return _resolve_server_path(self.config.server_settings.md2docx_project_path)
     
     def get_output_extension(self) -> str:
         return self.config.file_settings.output_extension_docx
@@ -228,59 +520,66 @@ class DOCXConverter(BaseConverter):
             abs_input_file = str(Path(input_file).absolute())
             abs_output_file = str(Path(output_file).absolute())
             
+            # 设置环境变量
+            env = self._get_subprocess_env(str(project_path / "src"))
+            
+            # 复用常驻工作进程，避免每个文件都启动一次解释器；
+            # 工作进程异常退出或超时时回退为单次子进程调用
+            if self.config.server_settings.use_worker_process:
+                try:
+                    return await self._convert_via_worker(
+                        project_path, env, abs_input_file, abs_output_file, debug
+                    )
+                except WorkerError as e:
+                    self.logger.warning("DOCX工作进程调用失败，改用单次子进程: %s", e)
+            
             # 构建命令
-            cmd = [
-                sys.executable, "src/cli.py",
-                abs_input_file, abs_output_file
-            ]
+            cmd = [*_MD2DOCX_CLI_CMD, abs_input_file, abs_output_file]
             
             if debug:
                 cmd.append("--debug")
             
             # 调试信息
             if debug:
-                self.logger.info(f"Executing command: {' '.join(cmd)}")
-                self.logger.info(f"Working directory: {project_path}")
-            
-            # 设置环境变量
-            env = os.environ.copy()
-            src_path = str(project_path / "src")
-            if 'PYTHONPATH' in env:
-                env['PYTHONPATH'] = f"{src_path}:{env['PYTHONPATH']}"
-            else:
-                env['PYTHONPATH'] = src_path
+                self.logger.info("Executing command: %s", ' '.join(cmd))
+                self.logger.info("Working directory: %s", project_path)
             
             # 执行命令
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 cwd=str(project_path),
                 env=env,
-                stdout=asyncio.subprocess.PIPE,
+                # 非调试模式下不使用 stdout，直接丢弃，避免读取管道
+                stdout=asyncio.subprocess.PIPE if debug else asyncio.subprocess.DEVNULL,
                 stderr=asyncio.subprocess.PIPE
             )
             
             stdout, stderr = await process.communicate()
             
+            # 输出只在调试模式或转换失败时使用，按需解码且只解码一次
+            stdout_text = _decode_output(stdout) if debug else ''
+            stderr_text = _decode_output(stderr) if debug or process.returncode != 0 else ''
+            
             if process.returncode == 0:
                 return {
                     'success': True,
                     'message': f"DOCX转换成功: {abs_output_file}",
                     'debug_info': {
                         'command': ' '.join(cmd),
-                        'stdout': stdout.decode('utf-8') if stdout else '',
-                        'stderr': stderr.decode('utf-8') if stderr else '',
+                        'stdout': stdout_text,
+                        'stderr': stderr_text,
                         'return_code': process.returncode
                     } if debug else None
                 }
             else:
-                error_msg = stderr.decode('utf-8') if stderr else "未知错误"
+                error_msg = stderr_text or "未知错误"
                 return {
                     'success': False,
                     'message': f"DOCX转换失败: {error_msg}",
                     'debug_info': {
                         'command': ' '.join(cmd),
-                        'stdout': stdout.decode('utf-8') if stdout else '',
-                        'stderr': stderr.decode('utf-8') if stderr else '',
+                        'stdout': stdout_text,
+                        'stderr': stderr_text,
                         'return_code': process.returncode
                     } if debug else None
                 }
@@ -291,32 +590,123 @@ class DOCXConverter(BaseConverter):
                 'message': f"DOCX子进程调用失败: {str(e)}"
             }
     
+    async def _convert_via_worker(
+        self,
+        project_path: Path,
+        env: Dict[str, str],
+        abs_input_file: str,
+        abs_output_file: str,
+        debug: bool
+    ) -> Dict[str, Union[str, bool]]:
+        """通过常驻工作进程转换
+
+        Raises:
+            WorkerError: 工作进程通信失败或超时（由调用方回退为单次子进程）
+        """
+        batcher = self._get_worker_batcher(
+            (sys.executable, str(_MD2DOCX_WORKER_SCRIPT)), project_path, env
+        )
+        response = await batcher.submit({
+            'input': abs_input_file,
+            'output': abs_output_file,
+            'debug': debug,
+            'encoding': self.config.file_settings.encoding
+        })
+        
+        return {
+            'success': bool(response.get('success')),
+            'message': response.get('message', ''),
+            'debug_info': {
+                'worker_command': ' '.join(batcher.pool.cmd),
+                'traceback': response.get('traceback')
+            } if debug else None
+        }
+    
+    def _get_process_pool(self, project_path: Path) -> Optional[ProcessPoolExecutor]:
+        """获取导入模式的进程池；只在并发数大于 1 的批量转换中使用
+
+        进程池按 _MAX_IMPORT_JOBS 一次性创建（进程按需启动），并发数由批量转换的信号量控制，
+        配置的并发数变化时不重建。
+        """
+        if not _in_batch.get() or _effective_parallel_jobs(self.config) <= 1:
+            return None
+        key = str(project_path)
+        if self._process_pool is None or self._process_pool_key != key:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False)
+            # 服务器进程中有多个线程（to_thread、工作进程通信等）和锁，fork 可能把被持有的锁复制到子进程中，
+            # 因此以 spawn 方式启动工作进程
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=_MAX_IMPORT_JOBS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _live_process_pools.add(self._process_pool)
+            self._process_pool_key = key
+        return self._process_pool
+    
+    def close(self) -> None:
+        super().close()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+            self._process_pool_key = None
+    
+    def _convert_content(self, converter: Any, content: str) -> Any:
+        """在工作线程中执行转换；共享的转换器实例同一时刻只处理一个文档"""
+        with self._md2docx_lock:
+            return converter.convert(content)
+    
     async def _convert_via_import(
         self, 
         input_file: str, 
         output_file: str, 
         debug: bool,
+        input_bytes: Optional[bytes] = None,
         **kwargs
     ) -> Dict[str, Union[str, bool]]:
         """通过直接导入 Python 模块转换"""
         try:
             project_path = self.get_project_path()
+            
+            # 并行转换时在进程池中执行，多个文件的渲染可以同时占用多个 CPU 核
+            process_pool = self._get_process_pool(project_path)
+            if process_pool is not None:
+                await asyncio.get_running_loop().run_in_executor(
+                    process_pool,
+                    _md2docx_import_job,
+                    str(project_path),
+                    str(Path(input_file).absolute()),
+                    str(Path(output_file).absolute()),
+                    debug,
+                    self.config.file_settings.encoding
+                )
+                return {
+                    'success': True,
+                    'message': f"DOCX转换成功: {output_file}"
+                }
+            
             if str(project_path) not in sys.path:
                 sys.path.insert(0, str(project_path))
             
             # 导入转换器
             from src.converter import BaseConverter
             
-            # 读取输入文件
-            with open(input_file, 'r', encoding=self.config.file_settings.encoding) as f:
-                content = f.read()
+            # 读取输入文件（在线程中执行，不阻塞事件循环）；调用方已读取时直接解码
+            if input_bytes is not None:
+                content = _decode_text(input_bytes, self.config.file_settings.encoding)
+            else:
+                content = await asyncio.to_thread(
+                    Path(input_file).read_text, encoding=self.config.file_settings.encoding
+                )
             
             # 执行转换
-            converter = BaseConverter(debug=debug)
-            doc = converter.convert(content)
+            converter = self._md2docx_converters.get(debug)
+            if converter is None:
+                converter = self._md2docx_converters[debug] = BaseConverter(debug=debug)
+            doc = await asyncio.to_thread(self._convert_content, converter, content)
             
-            # 保存文档
-            doc.save(output_file)
+            # 保存文档（同样在线程中执行，多个文件的保存可以并行）
+            await asyncio.to_thread(_save_document_atomic, doc, output_file)
             
             return {
                 'success': True,
@@ -337,15 +727,28 @@ class PPTXConverter(BaseConverter):
         return "pptx"
     
     def get_project_path(self) -> Path:
-        project_path = Path(self.config.server_settings.md2pptx_project_path)
-        if not project_path.is_absolute():
-            mcp_server_dir = Path(__file__).parent.parent
-            project_path = mcp_server_dir / project_path
-        return project_path
+        return _resolve_server_path(self.config.server_settings.md2pptx_project_path)
     
     def get_output_extension(self) -> str:
         return self.config.file_settings.output_extension_pptx
     
+    def _converter_source_files(self, project_path: Path) -> List[Path]:
+        # md2pptx 主脚本及同目录下的辅助模块
+        try:
+            with os.scandir(project_path) as entries:
+                modules = [Path(entry.path) for entry in entries if entry.name.endswith('.py')]
+        except OSError:
+            modules = []
+        return [project_path / "md2pptx", *sorted(modules)]
+    
+    def _cache_key_extras(self, **kwargs) -> Tuple:
+        # 配置的模板会写入 Markdown 开头，模板文件的内容同样决定产物
+        template_file = self.config.pptx_settings.template_file
+        template_fingerprint = (
+            conversion_cache.file_fingerprint(self.get_project_path() / template_file) if template_file else None
+        )
+        return super()._cache_key_extras(**kwargs) + (template_file, template_fingerprint)
+    
     async def _convert_via_subprocess(
         self, 
         input_file: str, 
@@ -363,70 +766,79 @@ class PPTXConverter(BaseConverter):
             abs_output_file = str(Path(output_file).absolute())
             
             # 使用当前 MCP 服务器的 Python 环境，而不是 md2pptx 项目的环境
-            mcp_server_dir = Path(__file__).parent.parent
-            
             # 确保使用当前虚拟环境的 Python
-            if 'VIRTUAL_ENV' in os.environ:
-                # 如果在虚拟环境中，使用虚拟环境的 Python
-                venv_python = Path(os.environ['VIRTUAL_ENV']) / 'bin' / 'python'
-                if venv_python.exists():
-                    python_executable = str(venv_python)
-                else:
-                    python_executable = sys.executable
-            else:
-                # 检查是否在 .venv 目录中
-                venv_python = mcp_server_dir / '.venv' / 'bin' / 'python'
-                if venv_python.exists():
-                    python_executable = str(venv_python)
-                else:
-                    python_executable = sys.executable
+            python_executable = _find_python_executable(os.environ.get('VIRTUAL_ENV'))
             
             # 构建命令 - md2pptx 从 stdin 读取
             cmd = [python_executable, "md2pptx", abs_output_file]
             
             # 调试信息
             if debug:
-                self.logger.info(f"Executing command: {' '.join(cmd)}")
-                self.logger.info(f"Working directory: {project_path}")
-                self.logger.info(f"Python executable: {python_executable}")
-            
-            # 读取输入文件内容
-            with open(input_file, 'r', encoding=self.config.file_settings.encoding) as f:
-                markdown_content = f.read()
+                self.logger.info("Executing command: %s", ' '.join(cmd))
+                self.logger.info("Working directory: %s", project_path)
+                self.logger.info("Python executable: %s", python_executable)
             
             # 添加模板信息到 markdown 内容开头（如果配置了模板）
+            header = b""
             template_file = self.config.pptx_settings.template_file
             if template_file and template_file != "":
                 # 检查模板文件是否存在
                 template_path = project_path / template_file
                 if template_path.exists():
-                    markdown_content = f"template: {template_file}\n\n{markdown_content}"
+                    header = f"template: {template_file}\n\n".encode('utf-8')
             
-            # 设置环境变量，确保使用当前虚拟环境的包
-            env = os.environ.copy()
+            # 设置环境变量，确保使用当前虚拟环境的包；添加 md2pptx 项目目录到 PYTHONPATH
+            env = self._get_subprocess_env(str(project_path))
             
-            # 添加 md2pptx 项目目录到 PYTHONPATH
-            if 'PYTHONPATH' in env:
-                env['PYTHONPATH'] = f"{project_path}:{env['PYTHONPATH']}"
-            else:
-                env['PYTHONPATH'] = str(project_path)
+            # 复用常驻工作进程，避免每个文件都启动解释器并重新导入 md2pptx 的依赖；
+            # 工作进程异常退出时回退为单次子进程调用
+            if self.config.server_settings.use_worker_process:
+                try:
+                    return await self._convert_via_worker(
+                        python_executable, project_path, env, input_file, abs_output_file, header, debug
+                    )
+                except WorkerError as e:
+                    self.logger.warning("PPTX工作进程调用失败，改用单次子进程: %s", e)
             
-            # 执行命令
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                cwd=str(project_path),
-                env=env,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            # 输入文件在启动子进程前打开，文件不存在时不必启动进程
+            with open(input_file, 'rb', buffering=0) as input_f:
+                # 执行命令
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    cwd=str(project_path),
+                    env=env,
+                    stdin=asyncio.subprocess.PIPE,
+                    # 非调试模式下不使用 stdout，直接丢弃，避免读取管道
+                    stdout=asyncio.subprocess.PIPE if debug else asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                
+                # 分块写入 stdin 的同时读取输出，避免子进程写满管道后双方互相等待
+                try:
+                    stdout, stderr, _ = await asyncio.gather(
+                        process.stdout.read() if debug else asyncio.sleep(0, b""),
+                        process.stderr.read(),
+                        _stream_to_stdin(process, input_f, self.config.file_settings.encoding, header)
+                    )
+                except BaseException:
+                    # 输入解码失败等情况下子进程仍在等待 stdin，先结束它再抛出，避免遗留进程
+                    if process.returncode is None:
+                        try:
+                            process.kill()
+                        except ProcessLookupError:
+                            pass
+                    await process.wait()
+                    raise
+                await process.wait()
             
-            stdout, stderr = await process.communicate(input=markdown_content.encode('utf-8'))
+            # 输出只在调试模式或转换失败时使用，按需解码且只解码一次
+            stdout_text = _decode_output(stdout) if debug else ''
+            stderr_text = _decode_output(stderr) if debug or process.returncode != 0 else ''
             
             if debug:
-                self.logger.info(f"Return code: {process.returncode}")
-                self.logger.info(f"Stdout: {stdout.decode('utf-8') if stdout else 'None'}")
-                self.logger.info(f"Stderr: {stderr.decode('utf-8') if stderr else 'None'}")
+                self.logger.info("Return code: %s", process.returncode)
+                self.logger.info("Stdout: %s", stdout_text or 'None')
+                self.logger.info("Stderr: %s", stderr_text or 'None')
             
             if process.returncode == 0:
                 return {
@@ -434,22 +846,22 @@ class PPTXConverter(BaseConverter):
                     'message': f"PPTX转换成功: {abs_output_file}",
                     'debug_info': {
                         'command': ' '.join(cmd),
-                        'stdout': stdout.decode('utf-8') if stdout else '',
-                        'stderr': stderr.decode('utf-8') if stderr else '',
+                        'stdout': stdout_text,
+                        'stderr': stderr_text,
                         'return_code': process.returncode,
                         'template_used': template_file,
                         'python_executable': python_executable
                     } if debug else None
                 }
             else:
-                error_msg = stderr.decode('utf-8') if stderr else "未知错误"
+                error_msg = stderr_text or "未知错误"
                 return {
                     'success': False,
                     'message': f"PPTX转换失败: {error_msg}",
                     'debug_info': {
                         'command': ' '.join(cmd),
-                        'stdout': stdout.decode('utf-8') if stdout else '',
-                        'stderr': stderr.decode('utf-8') if stderr else '',
+                        'stdout': stdout_text,
+                        'stderr': stderr_text,
                         'return_code': process.returncode,
                         'python_executable': python_executable
                     } if debug else None
@@ -461,11 +873,47 @@ class PPTXConverter(BaseConverter):
                 'message': f"PPTX子进程调用失败: {str(e)}"
             }
     
+    async def _convert_via_worker(
+        self,
+        python_executable: str,
+        project_path: Path,
+        env: Dict[str, str],
+        input_file: str,
+        abs_output_file: str,
+        header: bytes,
+        debug: bool
+    ) -> Dict[str, Union[str, bool]]:
+        """通过常驻工作进程转换
+
+        Raises:
+            WorkerError: 工作进程意外退出或通信失败
+        """
+        batcher = self._get_worker_batcher(
+            (python_executable, str(_MD2PPTX_WORKER_SCRIPT)), project_path, env
+        )
+        response = await batcher.submit({
+            'input': str(Path(input_file).absolute()),
+            'output': abs_output_file,
+            'debug': debug,
+            'encoding': self.config.file_settings.encoding,
+            'header': header.decode('utf-8')
+        })
+        
+        return {
+            'success': bool(response.get('success')),
+            'message': response.get('message', ''),
+            'debug_info': {
+                'worker_command': ' '.join(batcher.pool.cmd),
+                'traceback': response.get('traceback')
+            } if debug else None
+        }
+    
     async def _convert_via_import(
         self, 
         input_file: str, 
         output_file: str, 
         debug: bool,
+        input_bytes: Optional[bytes] = None,
         **kwargs
     ) -> Dict[str, Union[str, bool]]:
         """通过直接导入 Python 模块转换"""
@@ -489,21 +937,16 @@ class UnifiedConverterManager:
             'docx': DOCXConverter(self.config),
             'pptx': PPTXConverter(self.config)
         }
+        
+        jobs = _effective_parallel_jobs(self.config)
+        if jobs < self.config.batch_settings.parallel_jobs:
+            self.logger.info(
+                "子进程模式下并发数限制为 %d（配置值 %d）", jobs, self.config.batch_settings.parallel_jobs
+            )
     
     def _setup_logger(self) -> logging.Logger:
         """设置日志记录器"""
-        logger = logging.getLogger("unified_converter")
-        logger.setLevel(getattr(logging, self.config.batch_settings.log_level))
-        
-        if not logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-        
-        return logger
+        return _setup_logger("unified_converter", self.config.batch_settings.log_level)
     
     def get_converter(self, format_type: str) -> BaseConverter:
         """获取指定格式的转换器"""
@@ -511,6 +954,17 @@ class UnifiedConverterManager:
             raise ConversionError(f"不支持的格式: {format_type}")
         return self.converters[format_type]
     
+    def close(self) -> None:
+        """关闭各转换器的工作进程和进程池"""
+        for converter in self.converters.values():
+            converter.close()
+    
+    def clear_cache(self) -> int:
+        """清空转换结果缓存，返回删除的缓存文件数"""
+        removed = conversion_cache.clear_cache()
+        self.logger.info("已清空转换缓存: %d 个文件", removed)
+        return removed
+    
     def get_supported_formats(self) -> List[str]:
         """获取支持的格式列表"""
         return list(self.converters.keys())
@@ -521,6 +975,7 @@ class UnifiedConverterManager:
         output_format: str = "docx",
         output_file: Optional[str] = None,
         debug: bool = None,
+        input_bytes: Optional[bytes] = None,
         **kwargs
     ) -> Dict[str, Union[str, bool]]:
         """
@@ -531,6 +986,7 @@ class UnifiedConverterManager:
             output_format: 输出格式 (docx/pptx)
             output_file: 输出文件路径（可选）
             debug: 调试模式
+            input_bytes: 已读取的输入文件内容（可选）
             **kwargs: 格式特定参数
         
         Returns:
@@ -538,9 +994,9 @@ class UnifiedConverterManager:
         """
         try:
             converter = self.get_converter(output_format)
-            return await converter.convert(input_file, output_file, debug, **kwargs)
+            return await converter.convert(input_file, output_file, debug, input_bytes=input_bytes, **kwargs)
         except Exception as e:
-            self.logger.error(f"转换失败: {input_file} -> {e}")
+            self.logger.error("转换失败: %s -> %s", input_file, e)
             return {
                 'success': False,
                 'input_file': input_file,
@@ -576,18 +1032,30 @@ class UnifiedConverterManager:
         success_count = 0
         failed_count = 0
         
+        # 输入文件只读取一次，各格式共用（用于转换缓存的哈希和导入模式的转换）；
+        # 读取失败时由各格式的转换各自报告错误
+        input_bytes = None
+        if len(output_formats) > 1 and (
+            self.config.conversion_settings.output_cache or not self.config.server_settings.use_subprocess
+        ):
+            try:
+                input_bytes = await asyncio.to_thread(Path(input_file).read_bytes)
+            except OSError:
+                pass
+        
+        input_stem = Path(input_file).stem
         for format_type in output_formats:
             try:
                 # 确定输出文件路径
                 if output_dir:
+                    # 输出目录由转换器在转换前创建
                     output_path = Path(output_dir) / format_type
-                    output_path.mkdir(parents=True, exist_ok=True)
-                    output_file = str(output_path / f"{Path(input_file).stem}.{format_type}")
+                    output_file = str(output_path / f"{input_stem}.{format_type}")
                 else:
                     output_file = None
                 
                 result = await self.convert_single_file(
-                    input_file, format_type, output_file, debug, **kwargs
+                    input_file, format_type, output_file, debug, input_bytes=input_bytes, **kwargs
                 )
                 results.append(result)
                 
@@ -646,6 +1114,8 @@ class UnifiedConverterManager:
             
             output_path = Path(output_dir)
             output_path.mkdir(parents=True, exist_ok=True)
+            for converter in self.converters.values():
+                converter.forget_known_dirs()
             
             # 查找匹配的文件
             md_files = list(input_path.glob(file_pattern))
@@ -658,38 +1128,64 @@ class UnifiedConverterManager:
                     'message': f"在 {input_dir} 中未找到匹配 {file_pattern} 的文件"
                 }
             
-            self.logger.info(f"找到 {len(md_files)} 个文件待转换为 {len(output_formats)} 种格式")
+            self.logger.info("找到 %d 个文件待转换为 %d 种格式", len(md_files), len(output_formats))
             
             # 并行转换
             results = []
             success_count = 0
             failed_count = 0
             
-            # 使用线程池进行并行处理
-            with ThreadPoolExecutor(max_workers=self.config.batch_settings.parallel_jobs) as executor:
-                # 提交任务
-                future_to_file = {}
-                for md_file in md_files:
-                    future = executor.submit(
-                        asyncio.run,
-                        self.convert_multiple_formats(
+            # 日志在转换开始前创建，每个文件完成后立即写入
+            log_f = None
+            if self.config.batch_settings.create_log:
+                log_f = self._open_batch_log(input_dir, output_dir, output_formats)
+            
+            # 在当前事件循环中并发转换，信号量限制同时进行的任务数
+            semaphore = asyncio.Semaphore(_effective_parallel_jobs(self.config))
+            # 由 gather 创建的转换任务继承该标记，导入模式下改用进程池
+            batch_token = _in_batch.set(True)
+            
+            async def convert_file(md_file: Path) -> Dict[str, Any]:
+                try:
+                    async with semaphore:
+                        result = await self.convert_multiple_formats(
                             str(md_file), 
                             output_formats, 
                             str(output_path)
                         )
-                    )
-                    future_to_file[future] = md_file
-                
-                # 收集结果
-                for future in as_completed(future_to_file):
-                    result = future.result()
-                    results.extend(result['results'])
-                    success_count += result['success']
-                    failed_count += result['failed']
-            
-            # 创建日志文件
-            if self.config.batch_settings.create_log:
-                await self._create_batch_log(results, input_dir, output_dir, output_formats)
+                except Exception as e:
+                    result = {
+                        'success': 0,
+                        'failed': len(output_formats),
+                        'results': [{
+                            'success': False,
+                            'input_file': str(md_file),
+                            'output_file': 'N/A',
+                            'format': format_type,
+                            'message': str(e),
+                            'duration': 0,
+                            'file_size': 0
+                        } for format_type in output_formats]
+                    }
+                if log_f is not None:
+                    self._write_batch_log_entries(log_f, result['results'])
+                return result
+            
+            try:
+                file_results = await asyncio.gather(
+                    *(convert_file(md_file) for md_file in md_files)
+                )
+            finally:
+                _in_batch.reset(batch_token)
+                if log_f is not None:
+                    log_f.close()
+                    self.logger.info("批量转换日志已创建: %s", log_f.name)
+            
+            # 收集结果
+            for result in file_results:
+                results.extend(result['results'])
+                success_count += result['success']
+                failed_count += result['failed']
             
             return {
                 'total': len(md_files) * len(output_formats),
@@ -700,7 +1196,7 @@ class UnifiedConverterManager:
             }
         
         except Exception as e:
-            self.logger.error(f"批量转换失败: {str(e)}")
+            self.logger.error("批量转换失败: %s", e)
             return {
                 'total': 0,
                 'success': 0,
@@ -709,37 +1205,50 @@ class UnifiedConverterManager:
                 'message': f"批量转换失败: {str(e)}"
             }
     
-    async def _create_batch_log(
+    def _open_batch_log(
         self, 
-        results: List[Dict], 
         input_dir: str, 
         output_dir: str,
         output_formats: List[str]
-    ) -> None:
-        """创建批量转换日志"""
+    ):
+        """创建批量转换日志并写入表头，失败时返回 None"""
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             log_file = f"batch_convert_{timestamp}.log"
             
-            with open(log_file, 'w', encoding='utf-8') as f:
-                f.write(f"统一转换器批量转换日志\n")
-                f.write(f"转换时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"输入目录: {input_dir}\n")
-                f.write(f"输出目录: {output_dir}\n")
-                f.write(f"输出格式: {', '.join(output_formats)}\n")
-                f.write(f"{'='*80}\n\n")
-                
-                for result in results:
-                    status = "✅ 成功" if result['success'] else "❌ 失败"
-                    f.write(f"{status} | {result['format'].upper()} | {result['input_file']} -> {result['output_file']}\n")
-                    f.write(f"    消息: {result['message']}\n")
-                    f.write(f"    耗时: {result['duration']}s\n")
-                    f.write(f"    文件大小: {result['file_size']} bytes\n\n")
-            
-            self.logger.info(f"批量转换日志已创建: {log_file}")
+            # 大缓冲区 + 每个文件写完后显式 flush：一个文件的记录只需一次写入系统调用，
+            # 中途中断也能保留已完成部分
+            f = open(log_file, 'w', encoding='utf-8', buffering=_BATCH_LOG_BUFFER_SIZE)
+            f.write(
+                f"统一转换器批量转换日志\n"
+                f"转换时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                f"输入目录: {input_dir}\n"
+                f"输出目录: {output_dir}\n"
+                f"输出格式: {', '.join(output_formats)}\n"
+                f"{'='*80}\n\n"
+            )
+            f.flush()
+            return f
+        
+        except Exception as e:
+            self.logger.error("创建日志失败: %s", e)
+            return None
+    
+    def _write_batch_log_entries(self, f, results: List[Dict]) -> None:
+        """追加写入一个文件的转换结果"""
+        try:
+            for result in results:
+                status = "✅ 成功" if result['success'] else "❌ 失败"
+                f.write(
+                    f"{status} | {result['format'].upper()} | {result['input_file']} -> {result['output_file']}\n"
+                    f"    消息: {result['message']}\n"
+                    f"    耗时: {result['duration']}s\n"
+                    f"    文件大小: {result['file_size']} bytes\n\n"
+                )
+            f.flush()
         
         except Exception as e:
-            self.logger.error(f"创建日志失败: {str(e)}")
+            self.logger.error("写入日志失败: %s", e)
     
     async def list_markdown_files(
         self, 
@@ -764,19 +1273,21 @@ class UnifiedConverterManager:
             if not dir_path.is_dir():
                 raise ConversionError(f"路径不是目录: {directory}")
             
-            # 搜索文件
-            md_files = []
-            extensions = self.config.file_settings.supported_extensions
+            # 单次遍历目录，按扩展名过滤
+            match_extension = _extension_pattern(self.config.file_settings.supported_extension_set).search
+            file_list = []
             
             if recursive:
-                for ext in extensions:
-                    md_files.extend(dir_path.rglob(f"*{ext}"))
+                for root, _, files in os.walk(dir_path):
+                    for name in files:
+                        if match_extension(name):
+                            file_list.append(os.path.join(root, name))
             else:
-                for ext in extensions:
-                    md_files.extend(dir_path.glob(f"*{ext}"))
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        if match_extension(entry.name) and entry.is_file():
+                            file_list.append(entry.path)
             
-            # 转换为字符串列表并排序
-            file_list = [str(f) for f in md_files]
             file_list.sort()
             
             return {
@@ -787,7 +1298,7 @@ class UnifiedConverterManager:
             }
         
         except Exception as e:
-            self.logger.error(f"列出文件失败: {str(e)}")
+            self.logger.error("列出文件失败: %s", e)
             return {
                 'count': 0,
                 'files': [],
@@ -798,11 +1309,14 @@ class UnifiedConverterManager:
 
 
 # 全局统一转换管理器实例
-_unified_converter_manager = None
+_unified_converter_manager: Optional[UnifiedConverterManager] = None
+_unified_converter_lock = threading.Lock()
 
 def get_unified_converter_manager() -> UnifiedConverterManager:
-    """获取统一转换管理器实例"""
+    """获取统一转换管理器实例（线程安全的懒加载单例）"""
     global _unified_converter_manager
     if _unified_converter_manager is None:
-        _unified_converter_manager = UnifiedConverterManager()
+        with _unified_converter_lock:
+            if _unified_converter_manager is None:
+                _unified_converter_manager = UnifiedConverterManager()
     return _unified_converter_manager
@@ -0,0 +1,259 @@
+"""
+常驻工作进程池 - 复用转换子进程，避免每个文件都重新启动 Python 解释器
+
+工作进程通过 stdin/stdout 上的 JSON 行协议通信：每个请求、每个响应各占一行。
+"""
+import asyncio
+import atexit
+import json
+import logging
+import os
+import selectors
+import subprocess
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 所有存活的进程池，解释器退出时统一关闭其工作进程
+_live_pools: "weakref.WeakSet[WorkerPool]" = weakref.WeakSet()
+
+
+class WorkerError(Exception):
+    """工作进程通信错误"""
+    pass
+
+
+class WorkerPool:
+    """常驻工作进程池
+
+    按需启动最多 max_workers 个工作进程，请求完成后进程放回空闲列表复用。
+    阻塞的管道读写在线程中进行，因此进程池不绑定任何事件循环。
+    timeout 为单个请求等待响应的最长秒数（None 表示不限），超时的工作进程会被终止。
+    """
+
+    def __init__(
+        self,
+        cmd: Sequence[str],
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        max_workers: int = 1,
+        timeout: Optional[float] = None
+    ):
+        self.cmd = list(cmd)
+        self.cwd = cwd
+        self.env = env
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._idle: List[subprocess.Popen] = []
+        self._procs: List[subprocess.Popen] = []
+
+        _live_pools.add(self)
+
+    def _spawn(self) -> subprocess.Popen:
+        """启动一个新的工作进程"""
+        proc = subprocess.Popen(
+            self.cmd,
+            cwd=self.cwd,
+            env=self.env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+        with self._lock:
+            self._procs.append(proc)
+        logger.debug("启动工作进程 pid=%s: %s", proc.pid, self.cmd)
+        return proc
+
+    def _acquire(self) -> subprocess.Popen:
+        """取出一个空闲的工作进程，没有则新建"""
+        with self._lock:
+            while self._idle:
+                proc = self._idle.pop()
+                if proc.poll() is None:
+                    return proc
+                self._procs.remove(proc)
+        return self._spawn()
+
+    def _release(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            if proc in self._procs:
+                self._idle.append(proc)
+
+    def _discard(self, proc: subprocess.Popen) -> None:
+        """丢弃（并终止）一个状态不可信的工作进程"""
+        with self._lock:
+            if proc in self._procs:
+                self._procs.remove(proc)
+        _terminate(proc)
+
+    @staticmethod
+    def _read_line(proc: subprocess.Popen, timeout: Optional[float]) -> bytes:
+        """读取一行响应，超过 timeout 秒仍未读完时抛出 WorkerError
+
+        直接读取底层文件描述符（不经过 proc.stdout 的缓冲区），select 才能如实反映是否有数据可读。
+        协议是一问一答，工作进程不会提前写出下一行，因此不会多读。
+        """
+        fd = proc.stdout.fileno()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        chunks = []
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while True:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0 or not selector.select(remaining):
+                    raise WorkerError(f"工作进程超过 {timeout} 秒未响应")
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+                if chunk.endswith(b"\n"):
+                    return b"".join(chunks)
+
+    def request_sync(self, payload: Any, timeout: Optional[float] = None) -> Any:
+        """同步发送一个请求并等待响应
+
+        Args:
+            timeout: 本次请求的超时秒数，默认使用进程池的 timeout
+
+        Raises:
+            WorkerError: 工作进程意外退出、超时未响应或返回了无法解析的响应
+        """
+        if timeout is None:
+            timeout = self.timeout
+        with self._slots:
+            proc = self._acquire()
+            try:
+                line = json.dumps(payload, ensure_ascii=False).encode('utf-8') + b"\n"
+                proc.stdin.write(line)
+                proc.stdin.flush()
+                response = self._read_line(proc, timeout)
+                if not response:
+                    raise WorkerError(f"工作进程意外退出 (返回码: {proc.poll()})")
+                result = json.loads(response)
+            except BaseException as e:
+                # 请求/响应可能已错位，该进程不再复用
+                self._discard(proc)
+                if isinstance(e, (OSError, ValueError)):
+                    raise WorkerError(f"工作进程通信失败: {e}") from e
+                raise
+            self._release(proc)
+            return result
+
+    async def request(self, payload: Any, timeout: Optional[float] = None) -> Any:
+        """发送一个请求并等待响应（在线程中执行阻塞的管道读写）"""
+        return await asyncio.to_thread(self.request_sync, payload, timeout)
+
+    def shutdown(self) -> None:
+        """关闭所有工作进程"""
+        with self._lock:
+            procs = self._procs
+            self._procs = []
+            self._idle = []
+        for proc in procs:
+            _terminate(proc)
+
+
+class RequestBatcher:
+    """自适应请求合并器
+
+    同时发出的请求未达到 max_in_flight 时请求立即发出；达到上限后新到达的请求排队，
+    待任一进程空闲后合并为一次批量请求 ({"cmd": "batch", "items": [...]}) 发送，
+    从而在不牺牲并行度的前提下减少往返次数。
+    """
+
+    def __init__(self, pool: WorkerPool, max_batch: int = 16, max_in_flight: Optional[int] = None):
+        self.pool = pool
+        self.max_batch = max(1, max_batch)
+        # 同时发出的请求数上限（不超过进程池大小），可随时调整而无需重建进程池
+        self.max_in_flight = pool.max_workers if max_in_flight is None else max_in_flight
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._in_flight = 0
+        self._flush_scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """提交一个请求并等待其响应"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # 旧事件循环上的挂起请求已无法完成
+            self._loop = loop
+            self._pending = []
+            self._in_flight = 0
+            self._flush_scheduled = False
+            self._tasks = set()
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._schedule_flush()
+        return await future
+
+    def _schedule_flush(self) -> None:
+        # 推迟到下一轮事件循环，让同一时刻到达的请求有机会合并
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        self._pending = [(item, fut) for item, fut in self._pending if not fut.done()]
+        limit = max(1, min(self.max_in_flight, self.pool.max_workers))
+        while self._pending and self._in_flight < limit:
+            free_slots = limit - self._in_flight
+            size = min(self.max_batch, -(-len(self._pending) // free_slots))
+            batch, self._pending = self._pending[:size], self._pending[size:]
+            self._in_flight += 1
+            task = self._loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                results = [await self.pool.request(batch[0][0])]
+            else:
+                # 批量请求按条数放宽超时
+                timeout = self.pool.timeout * len(batch) if self.pool.timeout is not None else None
+                response = await self.pool.request({'cmd': 'batch', 'items': [item for item, _ in batch]}, timeout)
+                results = response.get('results') if isinstance(response, dict) else None
+                if not isinstance(results, list) or len(results) != len(batch):
+                    raise WorkerError("工作进程返回的批量响应格式无效")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            if self._pending:
+                self._schedule_flush()
+
+
+def _terminate(proc: subprocess.Popen) -> None:
+    """关闭 stdin 让工作进程自行退出，超时则强制终止"""
+    try:
+        proc.stdin.close()
+    except OSError:
+        pass
+    try:
+        proc.wait(timeout=1)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    if proc.stdout is not None:
+        proc.stdout.close()
+
+
+@atexit.register
+def _shutdown_all_pools() -> None:
+    for pool in list(_live_pools):
+        pool.shutdown()
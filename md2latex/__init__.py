@@ -11,27 +11,65 @@
 6. 更好的错误处理
 """
 
+import hashlib
+import threading
+from collections import OrderedDict
+
 from .core.converter import MD2LaTeXConverter
 from .core.latex_renderer import ImprovedLaTeXRenderer
 
 __version__ = "2.0.0"
 __author__ = "MD2DOCX-MCP-Server Team"
 
+# 便捷函数共享的转换器实例（每次转换都会新建渲染器，实例本身只缓存配置和模板）
+_converter = None
+
+# 转换结果缓存（LRU）：相同内容、配置和模板的转换直接返回上次的结果
+_LATEX_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_LATEX_CACHE_MAX = 4096
+_latex_cache_lock = threading.Lock()
+
+
+def _get_converter() -> MD2LaTeXConverter:
+    """获取（首次调用时创建）共享的转换器"""
+    global _converter
+    if _converter is None:
+        _converter = MD2LaTeXConverter()
+    return _converter
+
+
 # 便捷导入
 def convert_markdown_to_latex(markdown_content: str, 
                             config: str = "default",
                             template: str = "basic") -> str:
     """便捷转换函数"""
-    converter = MD2LaTeXConverter()
-    return converter.convert(markdown_content, config, template)
+    converter = _get_converter()
+    
+    # 只缓存预定义的配置和模板；文件路径指向的内容可能随时变化
+    if config not in converter.available_configs or template not in converter.available_templates:
+        return converter.convert(markdown_content, config, template)
+    
+    key = (hashlib.sha256(markdown_content.encode('utf-8')).digest()[:16], config, template)
+    with _latex_cache_lock:
+        cached = _LATEX_CACHE.get(key)
+        if cached is not None:
+            _LATEX_CACHE.move_to_end(key)
+            return cached
+    
+    result = converter.convert(markdown_content, config, template)
+    
+    with _latex_cache_lock:
+        _LATEX_CACHE[key] = result
+        if len(_LATEX_CACHE) > _LATEX_CACHE_MAX:
+            _LATEX_CACHE.popitem(last=False)
+    return result
 
 def convert_file_to_latex(input_file: str,
                          output_file: str = None,
                          config: str = "default", 
                          template: str = "basic") -> str:
     """便捷文件转换函数"""
-    converter = MD2LaTeXConverter()
-    return converter.convert_file(input_file, output_file, config, template)
+    return _get_converter().convert_file(input_file, output_file, config, template)
 
 __all__ = [
     'MD2LaTeXConverter',
@@ -37,9 +37,17 @@ class MD2LaTeXConverter:
             "academic": "academic_template.tex",
             "chinese_book": "chinese_book_template.tex"
         }
+        
+        # 预定义配置和模板加载后缓存，多次转换（如不同配置/模板组合）共享同一份
+        self._config_cache: Dict[str, Dict[str, Any]] = {}
+        self._template_cache: Dict[str, str] = {}
     
     def load_config(self, config_name: str = "default") -> Dict[str, Any]:
         """加载配置文件"""
+        cached = self._config_cache.get(config_name)
+        if cached is not None:
+            return cached
+        
         if config_name in self.available_configs:
             config_file = self.configs_path / self.available_configs[config_name]
         else:
@@ -57,9 +65,10 @@ class MD2LaTeXConverter:
             # 如果是中文或学术配置，需要合并默认配置
             if config_name in ["chinese", "academic"]:
                 default_config = self.load_config("default")
-                merged_config = {**default_config, **config}
-                return merged_config
+                config = {**default_config, **config}
             
+            if config_name in self.available_configs:
+                self._config_cache[config_name] = config
             return config
         except Exception as e:
             logger.error(f"加载配置文件失败: {e}")
@@ -67,6 +76,10 @@ class MD2LaTeXConverter:
     
     def load_template(self, template_name: str = "basic") -> str:
         """加载模板文件"""
+        cached = self._template_cache.get(template_name)
+        if cached is not None:
+            return cached
+        
         if template_name in self.available_templates:
             template_file = self.templates_path / self.available_templates[template_name]
         else:
@@ -79,10 +92,14 @@ class MD2LaTeXConverter:
         
         try:
             with open(template_file, 'r', encoding='utf-8') as f:
-                return f.read()
+                template = f.read()
         except Exception as e:
             logger.error(f"加载模板文件失败: {e}")
             return self._get_fallback_template()
+        
+        if template_name in self.available_templates:
+            self._template_cache[template_name] = template
+        return template
     
     def convert(self, 
                 markdown_content: str,
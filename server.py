@@ -146,7 +146,8 @@ async def configure_converter(
 - 输出目录: {settings.output_dir}
 - 保持结构: {settings.preserve_structure}
 - 自动时间戳: {settings.auto_timestamp}
-- 最大重试次数: {settings.max_retry_attempts}"""
+- 最大重试次数: {settings.max_retry_attempts}
+- 转换结果缓存: {settings.output_cache}"""
             elif setting_type == "batch":
                 settings = config_manager.batch_settings
                 return f"""📦 批量设置:
@@ -883,7 +884,7 @@ async def validate_markdown_file(file_path: str) -> str:
             return f"❌ 路径不是文件: {file_path}"
         
         # 扩展名检查
-        if file_path_obj.suffix.lower() not in config_manager.file_settings.supported_extensions:
+        if file_path_obj.suffix.lower() not in config_manager.file_settings.supported_extension_set:
             return f"❌ 不支持的文件类型: {file_path_obj.suffix}"
         
         # 文件大小检查
@@ -2304,7 +2304,7 @@ async def validate_markdown_file(file_path: str) -> str:
             return f"❌ 路径不是文件: {file_path}"
         
         # 扩展名检查
-        if file_path_obj.suffix.lower() not in config_manager.file_settings.supported_extensions:
+        if file_path_obj.suffix.lower() not in config_manager.file_settings.supported_extension_set:
             return f"❌ 不支持的文件类型: {file_path_obj.suffix}"
         
         # 文件大小检查